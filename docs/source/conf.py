@@ -21,6 +21,7 @@ extensions = [
     'sphinx.ext.autodoc',
     'sphinx.ext.autosummary',
     'sphinx.ext.intersphinx',
+    'sphinx.ext.napoleon',
 ]
 
 intersphinx_mapping = {
@@ -28,6 +29,7 @@ intersphinx_mapping = {
     'sphinx': ('https://www.sphinx-doc.org/en/master/', None),
 }
 intersphinx_disabled_domains = ['std']
+intersphinx_timeout = 5 # don't let a slow inventory mirror stall the build
 
 templates_path = ['_templates']
 
@@ -38,15 +40,6 @@ html_theme = 'sphinx_rtd_theme'
 # -- Options for EPUB output
 epub_show_urls = 'footnote'
 
-extensions = [
-    'sphinx.ext.duration',
-    'sphinx.ext.doctest',
-    'sphinx.ext.autodoc',
-    'sphinx.ext.autosummary',  # Ensure this is present
-    'sphinx.ext.intersphinx',
-    'sphinx.ext.napoleon',    # Add Napoleon for Google/Numpy docstrings
-]
-
 # Napoleon settings
 napoleon_google_docstring = True
 napoleon_numpy_docstring = True
@@ -61,6 +54,3 @@ napoleon_use_param = True
 napoleon_use_rtype = True
 
 autosummary_generate = True # Enable autosummary to generate rst files
-
-# ... (rest of the configuration)
-html_theme = 'sphinx_rtd_theme' #
\ No newline at end of file
@@ -1,15 +1,8 @@
 import os
+from collections import namedtuple
 import tkinter as tk
 from tkinter import ttk
-import numpy as np
-import pandas as pd
-from piec.measurement.discrete_waveform import HysteresisLoop, ThreePulsePund
-from piec.analysis.utilities import standard_csv_to_metadata_and_data
-from piec.drivers.oscilloscope.k_dsox3024a import KeysightDSOX3024a
-from piec.drivers.awg.k_81150a import Keysight81150a
-from piec.drivers.awg.virtual_awg import VirtualAwg
-from piec.drivers.oscilloscope.virtual_oscilloscope import VirtualScope
-from piec.measurement.gui_utils import MeasurementApp
+from piec.measurement.gui_utils import MeasurementApp, evaluate_number
 
 DEFAULTS = {"awg_address":"VIRTUAL",
             "osc_address":"VIRTUAL",
@@ -29,11 +22,31 @@ DEFAULTS = {"awg_address":"VIRTUAL",
             "p_u_delay": 1.0e-7,
             }
 
+# Everything a run depends on, hashable and comparable so unchanged re-runs can reuse the last experiment
+RunParams = namedtuple("RunParams", ["measurement_type", "awg_address", "osc_address", "save_dir", "v_div", "area",
+                                     "time_offset", "save_plots", "auto_timeshift", "dynamic"])
+
+# Dynamic inputs per measurement type as (key, label, converter), built by MeasurementApp.build_numeric_inputs
+DYNAMIC_FIELDS = {
+    "HysteresisLoop": [("frequency", "Frequency (Hz):", float),
+                       ("amplitude", "Amplitude (V):", float),
+                       ("offset", "Offset (V):", float),
+                       ("n_cycles", "Number of Cycles:", int)],
+    "ThreePulsePund": [("reset_amp", "Reset Amplitude (V):", float),
+                       ("reset_width", "Reset Width (s):", float),
+                       ("reset_delay", "Reset Delay (s):", float),
+                       ("p_u_amp", "P/U Amplitude (V):", float),
+                       ("p_u_width", "P/U Width (s):", float),
+                       ("p_u_delay", "P/U Delay (s):", float),
+                       ("offset", "Offset (V):", float)],
+}
+
 
 
 class FEMeasurementApp(MeasurementApp):
     def __init__(self, root):
         super().__init__(root, title="Ferroelectric Measurement GUI", geometry="1200x700")
+        self.load_defaults(DEFAULTS) # last successful run's values, before any widget reads them
         print("Welcome to the FE testing GUI! Please select a measurement type and choose your awg and osc addresses.")
         print("Ctrl+Enter: Run Measurement")
         print("Ctrl+1: Hysteresis Loop")
@@ -41,33 +54,32 @@ class FEMeasurementApp(MeasurementApp):
         print("Ctrl+r: Change V/div")
         print("Ctrl+t: Change Time Offset")
 
-        visa_resources = self.get_visa_resources()
-
         # Static Inputs (Save Dir is at row 0 in base)
         self.save_dir_entry.insert(0, DEFAULTS["save_dir"])
         ttk.Label(self.static_frame, text="AWG Address:").grid(row=1, column=0, sticky="w")
-        self.awg_address_entry = ttk.Combobox(self.static_frame, values=["VIRTUAL"]+list(visa_resources), state="readonly")
+        self.awg_address_entry = ttk.Combobox(self.static_frame, values=self._addr_values, state="readonly")
         self.awg_address_entry.grid(row=1, column=1, padx=5, pady=5)
         self.awg_address_entry.set(DEFAULTS["awg_address"])
         ttk.Button(self.static_frame, text="Refresh", command=self.refresh_instruments, style="TButton").grid(row=1, column=2, rowspan=2, padx=5)
 
         ttk.Label(self.static_frame, text="Oscilloscope Address:").grid(row=2, column=0, sticky="w")
-        self.osc_address_entry = ttk.Combobox(self.static_frame, values=["VIRTUAL"]+list(visa_resources), state="readonly")
+        self.osc_address_entry = ttk.Combobox(self.static_frame, values=self._addr_values, state="readonly")
         self.osc_address_entry.grid(row=2, column=1, padx=5, pady=5)
         self.osc_address_entry.set(DEFAULTS["osc_address"])
+        self.scan_visa_resources(self.update_instrument_lists)
 
         ttk.Label(self.static_frame, text="Oscilloscope V/div:").grid(row=3, column=0, sticky="w")
-        self.vdiv_entry = ttk.Entry(self.static_frame, width=24)
+        self.vdiv_entry = self.numeric_entry(self.static_frame, width=24)
         self.vdiv_entry.grid(row=3, column=1, padx=5, pady=5)
         self.vdiv_entry.insert(0, DEFAULTS["vdiv"])
 
         ttk.Label(self.static_frame, text="Sample Area (m^2):").grid(row=4, column=0, sticky="w")
-        self.area_entry = ttk.Entry(self.static_frame, width=24)
+        self.area_entry = self.numeric_entry(self.static_frame, convert=evaluate_number, width=24)
         self.area_entry.grid(row=4, column=1, padx=5, pady=5)
         self.area_entry.insert(0, DEFAULTS["area"])
 
         ttk.Label(self.static_frame, text="Time Offset (ns):").grid(row=5, column=0, sticky="w")
-        self.timeshift_entry = ttk.Entry(self.static_frame, width=24)
+        self.timeshift_entry = self.numeric_entry(self.static_frame, width=24)
         self.timeshift_entry.grid(row=5, column=1, padx=5, pady=5)
         self.timeshift_entry.insert(0, DEFAULTS["time_offset"])
 
@@ -86,26 +98,28 @@ class FEMeasurementApp(MeasurementApp):
         ttk.Label(self.static_frame, text="Measurement Type:").grid(row=6, column=0, sticky="w")
         self.measurement_type = ttk.Combobox(self.static_frame, values=["HysteresisLoop", "ThreePulsePund"], state="readonly")
         self.measurement_type.grid(row=6, column=1, padx=5, pady=5)
-        self.measurement_type.bind("<<ComboboxSelected>>", self.update_dynamic_inputs)
+        self.measurement_type.bind("<<ComboboxSelected>>", lambda event: self.debounce("dynamic_inputs", lambda: self.update_dynamic_inputs(event)))
 
         # Dynamic inputs section (Uses inherited self.dynamic_frame)
         
         # Placeholder for dynamic inputs
         self.dynamic_inputs = {}
         self._saved_dynamic = {}  # Cache for saved dynamic values per measurement type
+        self._dynamic_pool = {}  # frame title -> (dynamic_inputs, [(widget, grid_info)]) of hidden input rows
+        self._last_params = None  # RunParams the current self.experiment was built from
 
         # Plot configuration section (Uses inherited self.plot_config_frame)
         ttk.Label(self.plot_config_frame, text="X-axis:").grid(row=0, column=0, sticky="w")
         self.x_axis = ttk.Combobox(self.plot_config_frame, values=["time (s)", "applied voltage (V)", "current (A)", "polarization (uC/cm^2)"], state="readonly")
         self.x_axis.grid(row=0, column=1, padx=5, pady=5)
         self.x_axis.set("applied voltage (V)")
-        self.x_axis.bind("<<ComboboxSelected>>", self.plot_data)
+        self.x_axis.bind("<<ComboboxSelected>>", self.schedule_replot)
 
         ttk.Label(self.plot_config_frame, text="Y-axis:").grid(row=1, column=0, sticky="w")
         self.y_axis = ttk.Combobox(self.plot_config_frame, values=["time (s)", "applied voltage (V)", "current (A)", "polarization (uC/cm^2)"], state="readonly")
         self.y_axis.grid(row=1, column=1, padx=5, pady=5)
         self.y_axis.set("current (A)")
-        self.y_axis.bind("<<ComboboxSelected>>", self.plot_data)
+        self.y_axis.bind("<<ComboboxSelected>>", self.schedule_replot)
 
         # Add a checkbox for plot saving
         self.saveplots_entry = tk.BooleanVar(value=False)  # Default state is unchecked
@@ -135,7 +149,7 @@ class FEMeasurementApp(MeasurementApp):
         dynamic_title = self.dynamic_frame.cget("text").strip()
         if dynamic_title and self.dynamic_inputs:
             current_vals = {}
-            children = self.dynamic_frame.winfo_children()
+            children = self.visible_children(self.dynamic_frame)
             for i, widget in enumerate(children):
                 if isinstance(widget, ttk.Label) and i + 1 < len(children):
                     next_widget = children[i + 1]
@@ -231,7 +245,7 @@ class FEMeasurementApp(MeasurementApp):
             dynamic_data = self._saved_dynamic  # backward compat
 
         if dynamic_data:
-            children = self.dynamic_frame.winfo_children()
+            children = self.visible_children(self.dynamic_frame)
             for key, val in dynamic_data.items():
                 key_clean = key.rstrip(":")
                 for i, widget in enumerate(children):
@@ -250,11 +264,15 @@ class FEMeasurementApp(MeasurementApp):
         self.update_dynamic_inputs(None)
 
     def update_dynamic_inputs(self, event):
-        # Save current dynamic values before clearing (so switching back preserves edits)
+        # Nothing to rebuild if the selected type's inputs are already shown
         dynamic_title = self.dynamic_frame.cget("text").strip()
+        if self.dynamic_inputs and dynamic_title == f"{self.measurement_type.get()} INPUTS":
+            return
+
+        # Save current dynamic values before clearing (so switching back preserves edits)
         if dynamic_title and self.dynamic_inputs:
             current_vals = {}
-            children = self.dynamic_frame.winfo_children()
+            children = self.visible_children(self.dynamic_frame)
             for i, widget in enumerate(children):
                 if isinstance(widget, ttk.Label) and i + 1 < len(children):
                     next_widget = children[i + 1]
@@ -263,91 +281,53 @@ class FEMeasurementApp(MeasurementApp):
             if current_vals:
                 self._saved_dynamic[dynamic_title] = current_vals
 
-        # Clear previous dynamic inputs
-        for widget in self.dynamic_frame.winfo_children():
-            widget.destroy()
-        self.dynamic_inputs = {}
-        self.dynamic_frame.config(text=f"{str(self.measurement_type.get())} INPUTS")
+            # Hide the previous rows instead of destroying them, switching back re-grids the same widgets
+            rows = [(widget, widget.grid_info()) for widget in self.visible_children(self.dynamic_frame)]
+            self._dynamic_pool[dynamic_title] = (self.dynamic_inputs, rows)
+            for widget, _ in rows:
+                widget.grid_forget()
+
         measurement_type = self.measurement_type.get()
-        if measurement_type == "HysteresisLoop":
-            self.setup_hysteresis_inputs()
-        elif measurement_type == "ThreePulsePund":
-            self.setup_pund_inputs()
+        dynamic_title = f"{measurement_type} INPUTS"
+        self.dynamic_frame.config(text=dynamic_title)
+        if dynamic_title in self._dynamic_pool:
+            self.dynamic_inputs, rows = self._dynamic_pool.pop(dynamic_title)
+            for widget, info in rows:
+                widget.grid(**info)
+            return
+
+        self.dynamic_inputs = {}
+        if measurement_type in DYNAMIC_FIELDS:
+            self.dynamic_inputs = self.build_numeric_inputs(self.dynamic_frame, DYNAMIC_FIELDS[measurement_type], DEFAULTS)
         
         # Apply any saved values over the defaults
         self._apply_saved_dynamic()
 
     def update_dynamic_defaults(self):
-        # Update defaults to currently selected values
-        for key in self.dynamic_inputs:
-            DEFAULTS[key] = self.dynamic_inputs[key].get()
+        # Update defaults to the typed values the last run was started with, no need to re-read the entries
+        DEFAULTS.update(self._last_params.dynamic)
 
     def refresh_instruments(self):
         print('Refreshing VISA instruments...')
-        visa_resources = self.get_visa_resources()
-        
-        self.awg_address_entry["values"] = ["VIRTUAL"] + visa_resources
-        self.osc_address_entry["values"] = ["VIRTUAL"] + visa_resources
-        
         self.awg_address_entry.set("VIRTUAL")
         self.osc_address_entry.set("VIRTUAL")
-
-    def setup_hysteresis_inputs(self):
-        ttk.Label(self.dynamic_frame, text="Frequency (Hz):").grid(row=0, column=0, sticky="w")
-        self.dynamic_inputs["frequency"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["frequency"].grid(row=0, column=1, padx=5, pady=5)
-        self.dynamic_inputs["frequency"].insert(0, DEFAULTS["frequency"])
-
-        ttk.Label(self.dynamic_frame, text="Amplitude (V):").grid(row=1, column=0, sticky="w")
-        self.dynamic_inputs["amplitude"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["amplitude"].grid(row=1, column=1, padx=5, pady=5)
-        self.dynamic_inputs["amplitude"].insert(0, DEFAULTS["amplitude"])
-
-        ttk.Label(self.dynamic_frame, text="Offset (V):").grid(row=2, column=0, sticky="w")
-        self.dynamic_inputs["offset"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["offset"].grid(row=2, column=1, padx=5, pady=5)
-        self.dynamic_inputs["offset"].insert(0, DEFAULTS["offset"])
-
-        ttk.Label(self.dynamic_frame, text="Number of Cycles:").grid(row=3, column=0, sticky="w")
-        self.dynamic_inputs["n_cycles"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["n_cycles"].grid(row=3, column=1, padx=5, pady=5)
-        self.dynamic_inputs["n_cycles"].insert(0, DEFAULTS["n_cycles"])
-
-    def setup_pund_inputs(self):
-        ttk.Label(self.dynamic_frame, text="Reset Amplitude (V):").grid(row=0, column=0, sticky="w")
-        self.dynamic_inputs["reset_amp"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["reset_amp"].grid(row=0, column=1, padx=5, pady=5)
-        self.dynamic_inputs["reset_amp"].insert(0, DEFAULTS["reset_amp"])
-
-        ttk.Label(self.dynamic_frame, text="Reset Width (s):").grid(row=1, column=0, sticky="w")
-        self.dynamic_inputs["reset_width"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["reset_width"].grid(row=1, column=1, padx=5, pady=5)
-        self.dynamic_inputs["reset_width"].insert(0, DEFAULTS["reset_width"])
-
-        ttk.Label(self.dynamic_frame, text="Reset Delay (s):").grid(row=2, column=0, sticky="w")
-        self.dynamic_inputs["reset_delay"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["reset_delay"].grid(row=2, column=1, padx=5, pady=5)
-        self.dynamic_inputs["reset_delay"].insert(0, DEFAULTS["reset_delay"])
-
-        ttk.Label(self.dynamic_frame, text="P/U Amplitude (V):").grid(row=3, column=0, sticky="w")
-        self.dynamic_inputs["p_u_amp"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["p_u_amp"].grid(row=3, column=1, padx=5, pady=5)
-        self.dynamic_inputs["p_u_amp"].insert(0, DEFAULTS["p_u_amp"])
-
-        ttk.Label(self.dynamic_frame, text="P/U Width (s):").grid(row=4, column=0, sticky="w")
-        self.dynamic_inputs["p_u_width"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["p_u_width"].grid(row=4, column=1, padx=5, pady=5)
-        self.dynamic_inputs["p_u_width"].insert(0, DEFAULTS["p_u_width"])
-
-        ttk.Label(self.dynamic_frame, text="P/U Delay (s):").grid(row=5, column=0, sticky="w")
-        self.dynamic_inputs["p_u_delay"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["p_u_delay"].grid(row=5, column=1, padx=5, pady=5)
-        self.dynamic_inputs["p_u_delay"].insert(0, DEFAULTS["p_u_delay"])
-
-        ttk.Label(self.dynamic_frame, text="Offset (V):").grid(row=6, column=0, sticky="w")
-        self.dynamic_inputs["offset"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["offset"].grid(row=6, column=1, padx=5, pady=5)
-        self.dynamic_inputs["offset"].insert(0, DEFAULTS["offset"])
+        self.scan_visa_resources(self.update_instrument_lists, force=True)
+
+    def update_instrument_lists(self, visa_resources):
+        self.set_address_lists((self.awg_address_entry, self.osc_address_entry), visa_resources)
+
+    def collect_params(self):
+        """Reads every input once into an immutable, comparable RunParams"""
+        return RunParams(measurement_type=self.measurement_type.get(),
+                         awg_address=self.awg_address_entry.get(),
+                         osc_address=self.osc_address_entry.get(),
+                         save_dir=self.save_dir_entry.get(),
+                         v_div=self.vdiv_entry.value(),
+                         area=self.area_entry.value(),
+                         time_offset=self.timeshift_entry.value()*1.0e-9,
+                         save_plots=bool(self.saveplots_entry.get()),
+                         auto_timeshift=bool(self.auto_timeshift_entry.get()),
+                         dynamic=tuple((key, entry.value()) for key, entry in self.dynamic_inputs.items()))
 
     def run_measurement(self):
         if not self.measurement_type.get():
@@ -355,72 +335,60 @@ class FEMeasurementApp(MeasurementApp):
             return
 
         print(f"Running {self.measurement_type.get()} measurement...")
-        # get static inputs for passthrough to measurment object
-        awg_address = self.awg_address_entry.get()
-        osc_address = self.osc_address_entry.get()
-        save_dir = self.save_dir_entry.get()
-        measurement_type = self.measurement_type.get()
-        if awg_address == "VIRTUAL":
-            awg = VirtualAwg(awg_address)
+        params = self.collect_params()
+        # a fresh experiment every run so no per-run state (filename, metadata, history) carries over,
+        # the instrument sessions behind it are reused by open_instrument when the addresses are unchanged
+        self.experiment = self.build_experiment(params)
+        self._last_params = params
+        self.run_in_background(self.acquire_and_process, self.measurement_finished)
+
+    def acquire_and_process(self):
+        """Worker job: acquisition and the analysis (numba compile, csv write) both stay off the Tk thread"""
+        import matplotlib
+        matplotlib.use('Agg') # saved analysis figures are drawn off the Tk thread, the GUI's own canvas does not use pyplot
+        self.experiment.acquire()
+        self.experiment.process()
+
+    def build_experiment(self, params):
+        """Opens the instruments and creates the measurement object described by params"""
+        # imported here, and only the drivers this run uses, so the window comes up before the driver and analysis stacks are loaded
+        from piec.measurement.discrete_waveform import HysteresisLoop, ThreePulsePund
+        if params.awg_address == "VIRTUAL":
+            from piec.drivers.awg.virtual_awg import VirtualAwg as awg_class
         else:
-            awg = Keysight81150a(awg_address)
-        if osc_address == "VIRTUAL": 
-            osc = VirtualScope(osc_address)
+            from piec.drivers.awg.k_81150a import Keysight81150a as awg_class
+        if params.osc_address == "VIRTUAL":
+            from piec.drivers.oscilloscope.virtual_oscilloscope import VirtualScope as osc_class
         else:
-            osc = KeysightDSOX3024a(osc_address)
-
-        v_div = float(self.vdiv_entry.get())
-        area = float(eval(str(self.area_entry.get())))
-        time_offset = float(self.timeshift_entry.get())*1.0e-9
-        save_plots = bool(self.saveplots_entry.get())
-        show_plots = save_plots
-        auto_timeshift = bool(self.auto_timeshift_entry.get())
-
-        if measurement_type == "HysteresisLoop":
-            # get hyst specific inputs for passthrough to measurment object
-            frequency = float(self.dynamic_inputs["frequency"].get())
-            amplitude = float(self.dynamic_inputs["amplitude"].get())
-            offset = float(self.dynamic_inputs["offset"].get())
-            n_cycles = int(self.dynamic_inputs["n_cycles"].get())
-            # initiate hyst object
-            self.experiment = HysteresisLoop(awg=awg, osc=osc,
-                                             frequency=frequency, amplitude=amplitude,
-                                             offset=offset, n_cycles=n_cycles,
-                                             save_dir=save_dir, v_div=v_div, time_offset=time_offset, area=area,
-                                             save_plots=save_plots, show_plots=show_plots, auto_timeshift=auto_timeshift)
-            
-        elif measurement_type == "ThreePulsePund":
-            # get pund specific inputs for passthrough to measurment object
-            reset_amp = float(self.dynamic_inputs["reset_amp"].get())
-            reset_width = float(self.dynamic_inputs["reset_width"].get())
-            reset_delay = float(self.dynamic_inputs["reset_delay"].get())
-            p_u_amp = float(self.dynamic_inputs["p_u_amp"].get())
-            p_u_width = float(self.dynamic_inputs["p_u_width"].get())
-            p_u_delay = float(self.dynamic_inputs["p_u_delay"].get())
-            offset = float(self.dynamic_inputs["offset"].get())
-            # initiate pund object
-            self.experiment = ThreePulsePund(awg=awg, osc=osc,
-                                             reset_amp=reset_amp, reset_width=reset_width, reset_delay=reset_delay,
-                                             p_u_amp=p_u_amp, p_u_width=p_u_width, p_u_delay=p_u_delay,
-                                             save_dir=save_dir, v_div=v_div, time_offset=time_offset, area=area, offset=offset,
-                                             save_plots=save_plots, show_plots=show_plots, auto_timeshift=auto_timeshift)
-        self.experiment.run_experiment()
+            from piec.drivers.oscilloscope.k_dsox3024a import KeysightDSOX3024a as osc_class
+
+        # sessions are kept between runs and only reopened when an address changes
+        awg = self.open_instrument("awg", awg_class, params.awg_address)
+        osc = self.open_instrument("osc", osc_class, params.osc_address)
+
+        # dynamic input keys match the measurement constructor arguments. Analysis runs on the worker, so its
+        # figures are only saved (show_plots would need the Tk thread), the result itself is drawn in the GUI plot
+        experiment_class = HysteresisLoop if params.measurement_type == "HysteresisLoop" else ThreePulsePund
+        return experiment_class(awg=awg, osc=osc, **dict(params.dynamic),
+                                save_dir=params.save_dir, v_div=params.v_div, time_offset=params.time_offset, area=params.area,
+                                save_plots=params.save_plots, show_plots=False, auto_timeshift=params.auto_timeshift)
+
+    def measurement_finished(self, result=None):
         self.update_dynamic_defaults()
+        self.save_defaults(DEFAULTS)
+        self.cache_measurement(self.experiment.filename, self.experiment.metadata, self.experiment.data)
         self.plot_data(self.experiment.filename)
 
     def plot_data(self, event=None):
-        self.ax.clear()
-        metadata, data = standard_csv_to_metadata_and_data(self.experiment.filename)
-        x_data = data[self.x_axis.get()]
-        y_data = data[self.y_axis.get()]
+        if self.experiment is None: # axes picked before the first run
+            return
+        x_col, y_col = self.x_axis.get(), self.y_axis.get()
+        metadata, data = self.load_measurement(self.experiment.filename, (x_col, y_col))
+        x_data, y_data = data[x_col], data[y_col]
         self.timeshift_entry.delete(0, tk.END)
-        self.timeshift_entry.insert(0, metadata["time_offset"].values[0]*1e9) # update time offset input in case auto is used
+        self.timeshift_entry.insert(0, metadata["time_offset"]*1e9) # update time offset input in case auto is used
 
-        self.ax.plot(x_data, y_data, marker='.',color='k', label=f"{self.y_axis.get()} vs {self.x_axis.get()}")
-        self.ax.set_xlabel(self.x_axis.get())
-        self.ax.set_ylabel(self.y_axis.get())
-        # self.ax.legend()
-        self.canvas.draw()
+        self.update_plot(x_data, y_data, xlabel=x_col, ylabel=y_col)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -3,11 +3,6 @@ ctypes.windll.shcore.SetProcessDpiAwareness(2)
 
 import tkinter as tk
 from tkinter import ttk
-import numpy as np
-from piec.drivers.sourcemeter.keithley2400 import Keithley2400
-from piec.drivers.sourcemeter.virtual_keithley2400 import VirtualKeithley2400
-from piec.measurement.iv_sweep import IVSweep
-from piec.analysis.utilities import standard_csv_to_metadata_and_data
 from piec.measurement.gui_utils import MeasurementApp
 
 DEFAULTS = {
@@ -21,26 +16,33 @@ DEFAULTS = {
     "sense_mode": "2W",
 }
 
+# Sweep inputs as (key, label, converter), built by MeasurementApp.build_numeric_inputs
+DYNAMIC_FIELDS = [("v_start", "V Start (V):", float),
+                  ("v_stop", "V Stop (V):", float),
+                  ("num_steps", "Number of Steps:", int),
+                  ("current_compliance", "Current Compliance (A):", float),
+                  ("dwell_time", "Dwell Time (s):", float)]
+
 
 class IVSweepApp(MeasurementApp):
     def __init__(self, root):
         super().__init__(root, title="IV Sweep Measurement GUI", geometry="1600x900")
+        self.load_defaults(DEFAULTS) # last successful run's values, before any widget reads them
         print("Welcome to the IV Sweep GUI!")
         print("Ctrl+Enter: Run Measurement")
 
-        visa_resources = self.get_visa_resources()
-
         # Static Inputs (Save Dir is at row 0 in base)
         self.save_dir_entry.insert(0, DEFAULTS["save_dir"])
 
         ttk.Label(self.static_frame, text="Sourcemeter Address:").grid(row=1, column=0, sticky="w")
         self.sm_address_entry = ttk.Combobox(
             self.static_frame,
-            values=["VIRTUAL"] + list(visa_resources),
+            values=self._addr_values,
             state="readonly",
         )
         self.sm_address_entry.grid(row=1, column=1, padx=5, pady=5)
         self.sm_address_entry.set(DEFAULTS["sm_address"])
+        self.scan_visa_resources(self.update_instrument_lists)
         ttk.Button(
             self.static_frame, text="Refresh", command=self.refresh_instruments, style="TButton"
         ).grid(row=1, column=2, padx=5)
@@ -54,32 +56,7 @@ class IVSweepApp(MeasurementApp):
 
         # Dynamic Inputs — IV sweep parameters
         self.dynamic_frame.config(text="IV SWEEP INPUTS")
-        self.dynamic_inputs = {}
-
-        ttk.Label(self.dynamic_frame, text="V Start (V):").grid(row=0, column=0, sticky="w")
-        self.dynamic_inputs["v_start"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["v_start"].grid(row=0, column=1, padx=5, pady=5)
-        self.dynamic_inputs["v_start"].insert(0, DEFAULTS["v_start"])
-
-        ttk.Label(self.dynamic_frame, text="V Stop (V):").grid(row=1, column=0, sticky="w")
-        self.dynamic_inputs["v_stop"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["v_stop"].grid(row=1, column=1, padx=5, pady=5)
-        self.dynamic_inputs["v_stop"].insert(0, DEFAULTS["v_stop"])
-
-        ttk.Label(self.dynamic_frame, text="Number of Steps:").grid(row=2, column=0, sticky="w")
-        self.dynamic_inputs["num_steps"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["num_steps"].grid(row=2, column=1, padx=5, pady=5)
-        self.dynamic_inputs["num_steps"].insert(0, DEFAULTS["num_steps"])
-
-        ttk.Label(self.dynamic_frame, text="Current Compliance (A):").grid(row=3, column=0, sticky="w")
-        self.dynamic_inputs["current_compliance"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["current_compliance"].grid(row=3, column=1, padx=5, pady=5)
-        self.dynamic_inputs["current_compliance"].insert(0, DEFAULTS["current_compliance"])
-
-        ttk.Label(self.dynamic_frame, text="Dwell Time (s):").grid(row=4, column=0, sticky="w")
-        self.dynamic_inputs["dwell_time"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["dwell_time"].grid(row=4, column=1, padx=5, pady=5)
-        self.dynamic_inputs["dwell_time"].insert(0, DEFAULTS["dwell_time"])
+        self.dynamic_inputs = self.build_numeric_inputs(self.dynamic_frame, DYNAMIC_FIELDS, DEFAULTS)
 
         # Plot configuration
         ttk.Label(self.plot_config_frame, text="X-axis:").grid(row=0, column=0, sticky="w")
@@ -90,7 +67,7 @@ class IVSweepApp(MeasurementApp):
         )
         self.x_axis.grid(row=0, column=1, padx=5, pady=5)
         self.x_axis.set("voltage (V)")
-        self.x_axis.bind("<<ComboboxSelected>>", self.plot_data)
+        self.x_axis.bind("<<ComboboxSelected>>", self.schedule_replot)
 
         ttk.Label(self.plot_config_frame, text="Y-axis:").grid(row=1, column=0, sticky="w")
         self.y_axis = ttk.Combobox(
@@ -100,13 +77,15 @@ class IVSweepApp(MeasurementApp):
         )
         self.y_axis.grid(row=1, column=1, padx=5, pady=5)
         self.y_axis.set("current (A)")
-        self.y_axis.bind("<<ComboboxSelected>>", self.plot_data)
+        self.y_axis.bind("<<ComboboxSelected>>", self.schedule_replot)
 
     def refresh_instruments(self):
         print("Refreshing VISA instruments...")
-        visa_resources = self.get_visa_resources()
-        self.sm_address_entry["values"] = ["VIRTUAL"] + visa_resources
         self.sm_address_entry.set("VIRTUAL")
+        self.scan_visa_resources(self.update_instrument_lists, force=True)
+
+    def update_instrument_lists(self, visa_resources):
+        self.set_address_lists((self.sm_address_entry,), visa_resources)
 
     def run_measurement(self):
         print("Running IV Sweep measurement...")
@@ -115,11 +94,11 @@ class IVSweepApp(MeasurementApp):
         save_dir = self.save_dir_entry.get()
         sense_mode = self.sense_mode_entry.get()
 
-        v_start = float(self.dynamic_inputs["v_start"].get())
-        v_stop = float(self.dynamic_inputs["v_stop"].get())
-        num_steps = int(self.dynamic_inputs["num_steps"].get())
-        current_compliance = float(self.dynamic_inputs["current_compliance"].get())
-        dwell_time = float(self.dynamic_inputs["dwell_time"].get())
+        v_start = self.dynamic_inputs["v_start"].value()
+        v_stop = self.dynamic_inputs["v_stop"].value()
+        num_steps = self.dynamic_inputs["num_steps"].value()
+        current_compliance = self.dynamic_inputs["current_compliance"].value()
+        dwell_time = self.dynamic_inputs["dwell_time"].value()
 
         # Update defaults to current values
         DEFAULTS["v_start"] = v_start
@@ -129,10 +108,15 @@ class IVSweepApp(MeasurementApp):
         DEFAULTS["dwell_time"] = dwell_time
         DEFAULTS["sense_mode"] = sense_mode
 
+        from piec.measurement.iv_sweep import IVSweep
+
+        # only the driver this run uses is imported
         if sm_address == "VIRTUAL":
+            from piec.drivers.sourcemeter.virtual_keithley2400 import VirtualKeithley2400
             sourcemeter = VirtualKeithley2400()
         else:
-            sourcemeter = Keithley2400(sm_address)
+            from piec.drivers.sourcemeter.keithley2400 import Keithley2400
+            sourcemeter = self.open_instrument("sourcemeter", Keithley2400, sm_address)
 
         self.experiment = IVSweep(
             sourcemeter=sourcemeter,
@@ -144,19 +128,21 @@ class IVSweepApp(MeasurementApp):
             sense_mode=sense_mode,
             save_dir=save_dir,
         )
-        self.experiment.run_experiment()
+        self.run_in_background(self.experiment.run_experiment, self.measurement_finished)
+
+    def measurement_finished(self, result=None):
+        self.save_defaults(DEFAULTS)
+        self.cache_measurement(self.experiment.filename, self.experiment.metadata, self.experiment.data)
         self.plot_data()
 
     def plot_data(self, event=None):
-        self.ax.clear()
-        metadata, data = standard_csv_to_metadata_and_data(self.experiment.filename)
-        x_data = data[self.x_axis.get()]
-        y_data = data[self.y_axis.get()]
-
-        self.ax.plot(x_data, y_data, marker=".", color="k", label=f"{self.y_axis.get()} vs {self.x_axis.get()}")
-        self.ax.set_xlabel(self.x_axis.get())
-        self.ax.set_ylabel(self.y_axis.get())
-        self.canvas.draw()
+        if self.experiment is None: # axes picked before the first run
+            return
+        x_col, y_col = self.x_axis.get(), self.y_axis.get()
+        metadata, data = self.load_measurement(self.experiment.filename, (x_col, y_col))
+        x_data, y_data = data[x_col], data[y_col]
+
+        self.update_plot(x_data, y_data, xlabel=x_col, ylabel=y_col)
 
 
 if __name__ == "__main__":
@@ -3,19 +3,11 @@ ctypes.windll.shcore.SetProcessDpiAwareness(2)
 
 import tkinter as tk
 from tkinter import ttk
+import queue
+from concurrent.futures import wait
 import numpy as np
-import pandas as pd
-import time
-import os
-from piec.drivers.dmm.keithley193a import Keithley193a
-from piec.drivers.dc_callibrator.edc522 import EDC522
-from piec.drivers.stepper_motor.arduino_stepper import Geos_Stepper
-from piec.drivers.lockin.srs830 import SRS830
-from piec.measurement.magneto_transport import AMR
-from piec.analysis.utilities import standard_csv_to_metadata_and_data
 from piec.measurement.gui_utils import MeasurementApp
 
-import threading
 
 DEFAULTS = {
     "dmm_address": "VIRTUAL",
@@ -34,42 +26,56 @@ DEFAULTS = {
     "initialize_lockin": True
 }
 
+# Numeric AMR inputs as (key, label, converter), built by MeasurementApp.build_numeric_inputs
+DYNAMIC_FIELDS = [("field", "Magnetic Field (Oe):", float),
+                  ("angle_step", "Angle Step (deg):", float),
+                  ("total_angle", "Total Angle (deg):", float),
+                  ("amplitude", "Amplitude (V):", float),
+                  ("frequency", "Frequency (Hz):", float),
+                  ("measure_time", "Measure Time (s):", float)]
+
+# Order of the values in each sample AMR puts on its sample_queue
+SAMPLE_COLUMNS = ("angle", "field", "X", "Y")
+
 class AMRApp(MeasurementApp):
     def __init__(self, root):
         super().__init__(root, title="AMR Measurement GUI", geometry="1600x900")
+        self.load_defaults(DEFAULTS) # last successful run's values, before any widget reads them
         print("Welcome to the AMR Measurement GUI!")
         print("Ctrl+Enter: Run Measurement")
         
         self.measurement_thread = None
         self.is_measuring = False
-
-        visa_resources = self.get_visa_resources()
+        self.samples = queue.Queue() # points handed over by the running experiment, see drain_samples
+        self.live_data = {col: np.empty(0) for col in SAMPLE_COLUMNS}
 
         # Static Inputs
         self.save_dir_entry.insert(0, DEFAULTS["save_dir"])
 
         # Instrument selection row 1
         ttk.Label(self.static_frame, text="DMM Address:").grid(row=1, column=0, sticky="w")
-        self.dmm_address_entry = ttk.Combobox(self.static_frame, values=["VIRTUAL"] + list(visa_resources), state="readonly")
+        self.dmm_address_entry = ttk.Combobox(self.static_frame, values=self._addr_values, state="readonly")
         self.dmm_address_entry.grid(row=1, column=1, padx=5, pady=5)
         self.dmm_address_entry.set(DEFAULTS["dmm_address"])
 
         ttk.Label(self.static_frame, text="Calibrator Address:").grid(row=2, column=0, sticky="w")
-        self.calibrator_address_entry = ttk.Combobox(self.static_frame, values=["VIRTUAL"] + list(visa_resources), state="readonly")
+        self.calibrator_address_entry = ttk.Combobox(self.static_frame, values=self._addr_values, state="readonly")
         self.calibrator_address_entry.grid(row=2, column=1, padx=5, pady=5)
         self.calibrator_address_entry.set(DEFAULTS["calibrator_address"])
 
         # Instrument selection row 2
         ttk.Label(self.static_frame, text="Stepper Address:").grid(row=3, column=0, sticky="w")
-        self.stepper_address_entry = ttk.Combobox(self.static_frame, values=["VIRTUAL"] + list(visa_resources), state="readonly")
+        self.stepper_address_entry = ttk.Combobox(self.static_frame, values=self._addr_values, state="readonly")
         self.stepper_address_entry.grid(row=3, column=1, padx=5, pady=5)
         self.stepper_address_entry.set(DEFAULTS["stepper_address"])
 
         ttk.Label(self.static_frame, text="Lock-in Address:").grid(row=4, column=0, sticky="w")
-        self.lockin_address_entry = ttk.Combobox(self.static_frame, values=["VIRTUAL"] + list(visa_resources), state="readonly")
+        self.lockin_address_entry = ttk.Combobox(self.static_frame, values=self._addr_values, state="readonly")
         self.lockin_address_entry.grid(row=4, column=1, padx=5, pady=5)
         self.lockin_address_entry.set(DEFAULTS["lockin_address"])
 
+        self.scan_visa_resources(self.update_instrument_lists)
+
         ttk.Button(self.static_frame, text="Refresh", command=self.refresh_instruments, style="TButton").grid(row=1, column=2, padx=5)
         ttk.Button(self.static_frame, text="Autodetect", command=self.autodetect_instruments, style="TButton").grid(row=2, column=2, padx=5)
         ttk.Button(self.static_frame, text="Test Stepper", command=self.test_stepper, style="TButton").grid(row=3, column=2, padx=5)
@@ -77,41 +83,14 @@ class AMRApp(MeasurementApp):
         # Initialize dynamic inputs and plot config
         self.setup_dynamic_inputs()
 
+        self.line.set(marker="o", color="blue")
+        self.ax.set_title("AMR Measurement Data")
+
     def setup_dynamic_inputs(self):
         """Initializes the measurement parameters and plot configuration."""
         # Dynamic Inputs - AMR parameters
         self.dynamic_frame.config(text="AMR MEASUREMENT INPUTS")
-        self.dynamic_inputs = {}
-
-        ttk.Label(self.dynamic_frame, text="Magnetic Field (Oe):").grid(row=0, column=0, sticky="w")
-        self.dynamic_inputs["field"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["field"].grid(row=0, column=1, padx=5, pady=5)
-        self.dynamic_inputs["field"].insert(0, DEFAULTS["field"])
-
-        ttk.Label(self.dynamic_frame, text="Angle Step (deg):").grid(row=1, column=0, sticky="w")
-        self.dynamic_inputs["angle_step"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["angle_step"].grid(row=1, column=1, padx=5, pady=5)
-        self.dynamic_inputs["angle_step"].insert(0, DEFAULTS["angle_step"])
-
-        ttk.Label(self.dynamic_frame, text="Total Angle (deg):").grid(row=2, column=0, sticky="w")
-        self.dynamic_inputs["total_angle"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["total_angle"].grid(row=2, column=1, padx=5, pady=5)
-        self.dynamic_inputs["total_angle"].insert(0, DEFAULTS["total_angle"])
-
-        ttk.Label(self.dynamic_frame, text="Amplitude (V):").grid(row=3, column=0, sticky="w")
-        self.dynamic_inputs["amplitude"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["amplitude"].grid(row=3, column=1, padx=5, pady=5)
-        self.dynamic_inputs["amplitude"].insert(0, DEFAULTS["amplitude"])
-
-        ttk.Label(self.dynamic_frame, text="Frequency (Hz):").grid(row=4, column=0, sticky="w")
-        self.dynamic_inputs["frequency"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["frequency"].grid(row=4, column=1, padx=5, pady=5)
-        self.dynamic_inputs["frequency"].insert(0, DEFAULTS["frequency"])
-
-        ttk.Label(self.dynamic_frame, text="Measure Time (s):").grid(row=5, column=0, sticky="w")
-        self.dynamic_inputs["measure_time"] = ttk.Entry(self.dynamic_frame, width=20)
-        self.dynamic_inputs["measure_time"].grid(row=5, column=1, padx=5, pady=5)
-        self.dynamic_inputs["measure_time"].insert(0, DEFAULTS["measure_time"])
+        self.dynamic_inputs = self.build_numeric_inputs(self.dynamic_frame, DYNAMIC_FIELDS, DEFAULTS)
 
         ttk.Label(self.dynamic_frame, text="Sensitivity:").grid(row=6, column=0, sticky="w")
         self.dynamic_inputs["sensitivity"] = ttk.Entry(self.dynamic_frame, width=20)
@@ -132,13 +111,13 @@ class AMRApp(MeasurementApp):
         self.x_axis = ttk.Combobox(self.plot_config_frame, values=["angle", "field", "X", "Y"], state="readonly")
         self.x_axis.grid(row=0, column=1, padx=5, pady=5)
         self.x_axis.set("angle")
-        self.x_axis.bind("<<ComboboxSelected>>", self.plot_data)
+        self.x_axis.bind("<<ComboboxSelected>>", self.schedule_replot)
 
         ttk.Label(self.plot_config_frame, text="Y-axis:").grid(row=1, column=0, sticky="w")
         self.y_axis = ttk.Combobox(self.plot_config_frame, values=["angle", "field", "X", "Y"], state="readonly")
         self.y_axis.grid(row=1, column=1, padx=5, pady=5)
         self.y_axis.set("X")
-        self.y_axis.bind("<<ComboboxSelected>>", self.plot_data)
+        self.y_axis.bind("<<ComboboxSelected>>", self.schedule_replot)
 
     def test_stepper(self):
         addr = self.stepper_address_entry.get()
@@ -147,7 +126,9 @@ class AMRApp(MeasurementApp):
             return
 
         print(f"Testing Stepper at {addr}...")
+        self.close_instrument("stepper") # the serial port can only be open once
         from piec.drivers.autodetect import _safe_close
+        from piec.drivers.stepper_motor.arduino_stepper import Geos_Stepper
         
         try:
             # Create the specific Geos_Stepper instance
@@ -169,14 +150,16 @@ class AMRApp(MeasurementApp):
 
     def refresh_instruments(self):
         print("Refreshing VISA instruments...")
-        visa_resources = self.get_visa_resources()
-        self.dmm_address_entry["values"] = ["VIRTUAL"] + list(visa_resources)
-        self.calibrator_address_entry["values"] = ["VIRTUAL"] + list(visa_resources)
-        self.stepper_address_entry["values"] = ["VIRTUAL"] + list(visa_resources)
-        self.lockin_address_entry["values"] = ["VIRTUAL"] + list(visa_resources)
+        self.scan_visa_resources(self.update_instrument_lists, force=True)
+
+    def update_instrument_lists(self, visa_resources):
+        self.set_address_lists((self.dmm_address_entry, self.calibrator_address_entry,
+                                self.stepper_address_entry, self.lockin_address_entry), visa_resources)
 
     def autodetect_instruments(self):
         print("Autodetecting instruments... this may take a moment.")
+        for role in ("dmm", "calibrator", "stepper", "lockin"):
+            self.close_instrument(role) # sessions kept from the last run would hold the ports being probed
         from piec.drivers.autodetect import autodetect, _safe_close
         from piec.drivers.dmm.dmm import DMM
         from piec.drivers.dc_callibrator.dc_callibrator import DCCalibrator
@@ -232,12 +215,12 @@ class AMRApp(MeasurementApp):
         save_dir = self.save_dir_entry.get()
 
         # Get parameters
-        field = float(self.dynamic_inputs["field"].get())
-        angle_step = float(self.dynamic_inputs["angle_step"].get())
-        total_angle = float(self.dynamic_inputs["total_angle"].get())
-        amplitude = float(self.dynamic_inputs["amplitude"].get())
-        frequency = float(self.dynamic_inputs["frequency"].get())
-        measure_time = float(self.dynamic_inputs["measure_time"].get())
+        field = self.dynamic_inputs["field"].value()
+        angle_step = self.dynamic_inputs["angle_step"].value()
+        total_angle = self.dynamic_inputs["total_angle"].value()
+        amplitude = self.dynamic_inputs["amplitude"].value()
+        frequency = self.dynamic_inputs["frequency"].value()
+        measure_time = self.dynamic_inputs["measure_time"].value()
         sensitivity = self.dynamic_inputs["sensitivity"].get()
         initialize_lockin = self.initialize_lockin_var.get()
 
@@ -251,31 +234,38 @@ class AMRApp(MeasurementApp):
         DEFAULTS["sensitivity"] = sensitivity
         DEFAULTS["initialize_lockin"] = initialize_lockin
 
-        from piec.drivers.dmm.virtual_dmm import VirtualDMM
-        from piec.drivers.dc_callibrator.virtual_calibrator import VirtualCalibrator
-        from piec.drivers.stepper_motor.virtual_stepper import VirtualStepper
-        from piec.drivers.lockin.virtual_lockin import VirtualLockin
+        # imported here, and only the drivers this run uses, so the window comes up before the driver stacks are loaded
+        from piec.measurement.magneto_transport import AMR
 
-        # Initialize drivers
+        # Initialize drivers, sessions from the previous run are reused while the address stays the same
         if dmm_addr.upper() == "VIRTUAL":
-            dmm = VirtualDMM(dmm_addr)
+            from piec.drivers.dmm.virtual_dmm import VirtualDMM
+            dmm = self.open_instrument("dmm", VirtualDMM, dmm_addr)
         else:
-            dmm = Keithley193a(dmm_addr)
+            from piec.drivers.dmm.keithley193a import Keithley193a
+            dmm = self.open_instrument("dmm", Keithley193a, dmm_addr)
             
         if cal_addr.upper() == "VIRTUAL":
-            calibrator = VirtualCalibrator(cal_addr, voltage_callibration=float(DEFAULTS["voltage_calibration"]))
+            from piec.drivers.dc_callibrator.virtual_calibrator import VirtualCalibrator
+            calibrator = self.open_instrument("calibrator", VirtualCalibrator, cal_addr,
+                                              voltage_callibration=float(DEFAULTS["voltage_calibration"]))
         else:
-            calibrator = EDC522(cal_addr)
+            from piec.drivers.dc_callibrator.edc522 import EDC522
+            calibrator = self.open_instrument("calibrator", EDC522, cal_addr)
             
         if step_addr.upper() == "VIRTUAL":
-            stepper = VirtualStepper(step_addr)
+            from piec.drivers.stepper_motor.virtual_stepper import VirtualStepper
+            stepper = self.open_instrument("stepper", VirtualStepper, step_addr)
         else:
-            stepper = Geos_Stepper(step_addr)
+            from piec.drivers.stepper_motor.arduino_stepper import Geos_Stepper
+            stepper = self.open_instrument("stepper", Geos_Stepper, step_addr)
             
         if lock_addr.upper() == "VIRTUAL":
-            lockin = VirtualLockin(lock_addr)
+            from piec.drivers.lockin.virtual_lockin import VirtualLockin
+            lockin = self.open_instrument("lockin", VirtualLockin, lock_addr)
         else:
-            lockin = SRS830(lock_addr)
+            from piec.drivers.lockin.srs830 import SRS830
+            lockin = self.open_instrument("lockin", SRS830, lock_addr)
 
         # Instantiate experiment
         self.experiment = AMR(
@@ -293,6 +283,10 @@ class AMRApp(MeasurementApp):
             save_dir=save_dir,
             live_plot=False  # GUI has its own plot update loop
         )
+        # the plot is fed from memory, the CSV the experiment writes is only for keeping the data
+        self.samples = queue.Queue()
+        self.live_data = {col: np.empty(0) for col in SAMPLE_COLUMNS}
+        self.experiment.sample_queue = self.samples
 
         self.is_measuring = True
         self.paused = False
@@ -302,13 +296,12 @@ class AMRApp(MeasurementApp):
         # Add stop and pause buttons during measurement
         self.add_control_buttons()
 
-        # Run experiment in a background thread
-        self.measurement_thread = threading.Thread(
-            target=self.experiment.run_experiment,
-            kwargs={'configure_lockin': initialize_lockin},
-            daemon=True
+        # Run experiment on the shared worker, completion is reported back on the Tk thread
+        self.measurement_thread = self.run_in_background(
+            lambda: self.experiment.run_experiment(configure_lockin=initialize_lockin),
+            on_done=self.measurement_finished,
+            on_error=self.measurement_finished
         )
-        self.measurement_thread.start()
         
         # Start the plot auto-update loop
         self.update_plot_loop()
@@ -332,7 +325,7 @@ class AMRApp(MeasurementApp):
             return
             
         self.paused = not self.paused
-        self.experiment.pause_requested = self.paused
+        self.experiment.pause_requested = self.paused # the capture loop blocks on this instead of polling
         self.pause_button.config(text="RESUME" if self.paused else "PAUSE")
         print("Measurement paused." if self.paused else "Measurement resumed.")
 
@@ -341,9 +334,16 @@ class AMRApp(MeasurementApp):
             return
             
         print("Stopping measurement...")
-        self.experiment.abort_requested = True
+        self.experiment.abort_requested = True # also releases a paused run
         self.stop_button.config(state='disabled')
 
+    def on_closing(self):
+        # let a running (or paused) capture loop return so the worker thread does not keep the process alive
+        if self.is_measuring and self.experiment:
+            self.experiment.abort_requested = True
+            wait([self.measurement_thread], timeout=5) # it returns before its next point, closing the instruments after that
+        super().on_closing()
+
     def cleanup_controls(self):
         """Removes control buttons and restores the run button."""
         if hasattr(self, 'control_frame'):
@@ -352,46 +352,45 @@ class AMRApp(MeasurementApp):
         self.run_button.config(state='normal')
 
     def update_plot_loop(self):
-        """Periodically updates the plot from the CSV file."""
+        """Periodically updates the plot with the points captured while the measurement runs."""
         if not self.is_measuring:
             return
 
         self.plot_data()
-        
-        if self.measurement_thread and self.measurement_thread.is_alive():
-            # Check back in 2 seconds
-            self.root.after(2000, self.update_plot_loop)
-        else:
-            self.is_measuring = False
-            self.cleanup_controls()
-            print("Measurement complete.")
-            self.plot_data() # Final update
+        # Check back in 2 seconds
+        self.root.after(2000, self.update_plot_loop)
+
+    def measurement_finished(self, result=None):
+        """Called on the Tk thread once the worker returns (or raises)."""
+        self.is_measuring = False
+        self.cleanup_controls()
+        print("Measurement complete.")
+        if not isinstance(result, Exception):
+            self.save_defaults(DEFAULTS)
+        self.plot_data() # Final update
+
+    def drain_samples(self):
+        """Appends every point the experiment queued since the last call to self.live_data"""
+        rows = []
+        while True:
+            try:
+                rows.append(self.samples.get_nowait())
+            except queue.Empty:
+                break
+        if rows:
+            new = np.array(rows, dtype=np.float64)
+            self.live_data = {col: np.concatenate([self.live_data[col], new[:, i]]) for i, col in enumerate(SAMPLE_COLUMNS)}
 
     def plot_data(self, event=None):
-        if not hasattr(self, 'experiment') or self.experiment.filename is None:
+        if self.experiment is None:
             return
-            
-        if not os.path.exists(self.experiment.filename):
+        self.drain_samples()
+        x_col = self.x_axis.get()
+        y_col = self.y_axis.get()
+        if len(self.live_data[x_col]) == 0:
             return
 
-        try:
-            metadata, data = standard_csv_to_metadata_and_data(self.experiment.filename)
-            if data is None or data.empty:
-                return
-
-            self.ax.clear()
-            x_col = self.x_axis.get()
-            y_col = self.y_axis.get()
-            
-            if x_col in data.columns and y_col in data.columns:
-                self.ax.plot(data[x_col], data[y_col], marker="o", color="blue", label=f"{y_col} vs {x_col}")
-                self.ax.set_xlabel(x_col)
-                self.ax.set_ylabel(y_col)
-                self.ax.set_title("AMR Measurement Data")
-                self.canvas.draw()
-        except Exception:
-            # File might be busy, just skip this update
-            pass
+        self.update_plot(self.live_data[x_col], self.live_data[y_col], xlabel=x_col, ylabel=y_col)
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,9 +1,43 @@
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 from scipy.integrate import cumulative_trapezoid
 from piec.analysis.utilities import *
 
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, the current/polarization pass falls back to numpy + scipy
+    njit = None
+
+def _hyst_core_numpy(t, v, area):
+    """Offset corrected current (A) and integrated polarization (uC/cm^2) from the voltage across the 50 Ohm input"""
+    current = v/50 # 50Ohm conversion
+    current -= np.mean(current[:20]) # offset correct, in place
+    polarization = cumulative_trapezoid(current*(100/area), t, initial=0) # area correction and C/m^2 to uC/cm^2 folded into one multiply
+    return current, polarization
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _hyst_core(t, v, area):
+        """Same as _hyst_core_numpy, with the offset correction and trapezoid integration fused into one loop"""
+        n = v.shape[0]
+        n_offset = min(n, 20)
+        offset = 0.0
+        for i in range(n_offset):
+            offset += v[i]/50
+        offset /= n_offset
+        current = np.empty(n)
+        polarization = np.empty(n)
+        scale = 100/area
+        current[0] = v[0]/50 - offset
+        polarization[0] = 0.0
+        for i in range(1, n):
+            current[i] = v[i]/50 - offset
+            polarization[i] = polarization[i-1] + (t[i] - t[i-1])*(current[i] + current[i-1])*scale/2.0
+        return current, polarization
+else:
+    _hyst_core = _hyst_core_numpy
+
 def process_raw_hyst(path:str, show_plots=False, save_plots=False, auto_timeshift=False):
     """
         Performs standard analysis on a 'raw' hyst data csv. Will add current (in A), and polarization (in uC/cm^2) columns, and will print/save plots if specified.
@@ -14,81 +48,87 @@ def process_raw_hyst(path:str, show_plots=False, save_plots=False, auto_timeshif
         :param auto_timeshift: auto-detect time offset of data? Assumes max time at max P = time at max V. WARNING: DOES NOT WORK FOR LEAKY SAMPLES!!
         """
     metadata, raw_df = standard_csv_to_metadata_and_data(path)
-    processed_df = raw_df
 
-    processed_df['time (s)'] = processed_df['time (s)'].values - processed_df['time (s)'].values[0] # make sure time starts at zero
+    # work on plain arrays, the DataFrame is only assembled once at the end
+    t = raw_df['time (s)'].to_numpy(dtype=np.float64)
+    t = t - t[0] # make sure time starts at zero
+    v = raw_df['voltage (V)'].to_numpy(dtype=np.float64)
 
     # get relevant values from metadata and math
-    amp = metadata['amplitude'].values[0]
-    frequency = metadata['frequency'].values[0]
+    md = metadata.iloc[0].to_dict() # one row, unpacked once into plain scalars
+    amp = md['amplitude']
+    frequency = md['frequency']
     length = 1/frequency
-    timestep = processed_df['time (s)'].values[-1]/len(processed_df)
-    area = metadata['area'].values[0]
-    N = metadata['n_cycles'].values[0]
-    n_length = len(processed_df)
-    time_offset = metadata['time_offset'].values[0]
+    n_length = len(t)
+    timestep = t[-1]/n_length
+    area = md['area']
+    N = md['n_cycles']
+    time_offset = md['time_offset']
     
-    # add on time-dependent processed arrays
-    processed_df['current (A)'] = processed_df['voltage (V)']/50 # 50Ohm conversion, area correction, C/m^2 to uC/cm^2
-    processed_df['current (A)'] = processed_df['current (A)'].values - np.mean(processed_df['current (A)'].values[:20]) # offset correct
-    processed_df['polarization (uC/cm^2)'] = cumulative_trapezoid(processed_df['current (A)']/area*100, processed_df['time (s)'], initial=0)
+    # time-dependent processed arrays
+    current, polarization = _hyst_core(t, v, float(area))
 
     if auto_timeshift:
         # determine time offset
         len_first_wave = n_length//N # cut out first triangle wave response
-        first_pol_wave = processed_df['polarization (uC/cm^2)'].values[:len_first_wave]
-        max_v_time = processed_df['time (s)'].values[int(length//(timestep*4*N))] # first max in applied V should be at the length of the waveform /(4*n_cycles)
-        max_p_time = processed_df['time (s)'].values[np.argmax(first_pol_wave)] # find time at first poarization maximum
+        first_pol_wave = polarization[:len_first_wave]
+        max_v_time = t[int(length//(timestep*4*N))] # first max in applied V should be at the length of the waveform /(4*n_cycles)
+        max_p_time = t[np.argmax(first_pol_wave)] # find time at first poarization maximum
         time_offset = max_p_time - max_v_time # assume that first max in polarization coincides with first max in voltage in time
 
     if time_offset < 0:
         print("WARNING: Negative time offset detected, full waveform possibly not captured or data too noisy.")
 
     # create applied voltage array from nominal assumptions
-    interp_v_array = np.array([0,1,0,-1,0]+([1,0,-1,0]*(N-1)))*amp
+    # same corner points configure_awg densifies for the AWG, 0 followed by N cycles of (1, 0, -1, 0)
+    interp_v_array = np.empty(4*int(N)+1)
+    interp_v_array[0] = 0.0
+    interp_v_array[1:] = np.tile([1.0, 0.0, -1.0, 0.0], int(N))
+    interp_v_array *= amp
     v_applied = interpolate_sparse_to_dense(np.linspace(0,len(interp_v_array),len(interp_v_array)), interp_v_array, total_points=int(length//timestep))
-    initial_delay = np.zeros(int(time_offset//timestep))
-    v_applied = np.concatenate([initial_delay, v_applied])
-
-    if len(v_applied)<len(processed_df):
-        v_applied = np.concatenate([v_applied, np.zeros(len(processed_df) - len(v_applied))]) #make sure arrays are the same length
+    v_applied = place_waveform(v_applied, int(time_offset//timestep), n_length) # delayed by the time offset, one array as long as the data
 
-    processed_df['applied voltage (V)'] = v_applied[:len(processed_df)]
+    processed_df = raw_df.assign(**{'time (s)': t,
+                                    'current (A)': current,
+                                    'polarization (uC/cm^2)': polarization,
+                                    'applied voltage (V)': v_applied})
 
     # optional plotting
     if show_plots or save_plots:
+        import matplotlib.pyplot as plt # only paid for when plotting, batch processing never loads matplotlib
+        stem = path[:-4] # saved plots sit next to the csv
         #PV Loop plot
         fig, ax = plt.subplots(tight_layout=True)
-        ax.plot(processed_df['applied voltage (V)'], processed_df['polarization (uC/cm^2)'], color='k')
+        ax.plot(v_applied, polarization, color='k')
         ax.set_xlabel('applied voltage (V)')
         ax.set_ylabel('polarization (uC/cm^2)')
         if save_plots:
-            fig.savefig(path[:-4]+'_PV.png')
+            fig.savefig(stem+'_PV.png')
         if show_plots:
             plt.show()
         plt.close()
 
         #IV Loop plot
         fig, ax = plt.subplots(tight_layout=True)
-        ax.plot(processed_df['applied voltage (V)'], processed_df['current (A)'], color='k')
+        ax.plot(v_applied, current, color='k')
         ax.set_xlabel('applied voltage (V)')
         ax.set_ylabel('current (A)')
         if save_plots:
-            fig.savefig(path[:-4]+'_IV.png')
+            fig.savefig(stem+'_IV.png')
         if show_plots:
             plt.show()
         plt.close()
 
         #Polarization vs applied current plot
         fig, ax = plt.subplots(tight_layout=True)
-        ax.plot(processed_df['time (s)'], processed_df['polarization (uC/cm^2)'], color='k')
+        ax.plot(t, polarization, color='k')
         ax.set_xlabel('time (s)')
         ax.set_ylabel('polarization (uC/cm^2)')
         ax1 = ax.twinx()
-        ax1.plot(processed_df['time (s)'], processed_df['applied voltage (V)'], color='r')
+        ax1.plot(t, v_applied, color='r')
         ax1.set_ylabel('applied voltage (V)')
         if save_plots:
-            fig.savefig(path[:-4]+'_trace.png')
+            fig.savefig(stem+'_trace.png')
         if show_plots:
             plt.show()
         plt.close()
@@ -96,4 +136,5 @@ def process_raw_hyst(path:str, show_plots=False, save_plots=False, auto_timeshif
     metadata['time_offset'] = time_offset
     metadata['processed'] = True
     # update csv with new processed data
-    metadata_and_data_to_csv(metadata, processed_df, path)
\ No newline at end of file
+    metadata_and_data_to_csv(metadata, processed_df, path)
+    return metadata, processed_df
\ No newline at end of file
@@ -1,68 +1,98 @@
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
 from scipy.integrate import cumulative_trapezoid
 from scipy.signal import find_peaks
 from piec.analysis.utilities import *
 
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, the current/polarization pass falls back to numpy + scipy
+    njit = None
+
+def _pund_core_numpy(t, v, area):
+    """Current (A) and integrated polarization (uC/cm^2) from the voltage across the 50 Ohm input"""
+    current = v/50 # 50Ohm conversion
+    polarization = cumulative_trapezoid(current, t, initial=0)*(100/area) # area correction and C/m^2 to uC/cm^2 folded into one multiply
+    return current, polarization
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _pund_core(t, v, area):
+        """Same as _pund_core_numpy, with the conversion and trapezoid integration fused into one loop"""
+        n = v.shape[0]
+        current = np.empty(n)
+        polarization = np.empty(n)
+        scale = 100/area
+        current[0] = v[0]/50
+        polarization[0] = 0.0
+        for i in range(1, n):
+            current[i] = v[i]/50
+            polarization[i] = polarization[i-1] + (t[i] - t[i-1])*(current[i] + current[i-1])*scale/2.0
+        return current, polarization
+else:
+    _pund_core = _pund_core_numpy
+
 def process_raw_3pp(path:str, show_plots=False, save_plots=False, auto_timeshift=True):
     metadata, raw_df = standard_csv_to_metadata_and_data(path)
-    processed_df = raw_df
 
-    processed_df['time (s)'] = processed_df['time (s)'].values - processed_df['time (s)'].values[0] # make sure time starts at zero
+    # work on plain arrays, the DataFrame is only assembled once at the end
+    t = raw_df['time (s)'].to_numpy(dtype=np.float64)
+    t = t - t[0] # make sure time starts at zero
+    v = raw_df['voltage (V)'].to_numpy(dtype=np.float64)
+    n_length = len(t)
 
     # get relevant values from metadata and math
-    reset_amp = metadata['reset_amp'].values[0]
-    reset_width = metadata['reset_width'].values[0]
-    reset_delay = metadata['reset_delay'].values[0]
-    p_u_amp = metadata['p_u_amp'].values[0]
-    p_u_width = metadata['p_u_width'].values[0]
-    p_u_delay = metadata['p_u_delay'].values[0]
-    timestep = processed_df['time (s)'].values[-1]/len(processed_df)
-    area = metadata['area'].values[0]
-    length = metadata['length'].values[0]
-    time_offset = metadata['time_offset'].values[0]
+    md = metadata.iloc[0].to_dict() # one row, unpacked once into plain scalars
+    reset_amp = md['reset_amp']
+    reset_width = md['reset_width']
+    reset_delay = md['reset_delay']
+    p_u_amp = md['p_u_amp']
+    p_u_width = md['p_u_width']
+    p_u_delay = md['p_u_delay']
+    timestep = t[-1]/n_length
+    area = md['area']
+    length = md['length']
+    time_offset = md['time_offset']
     polarity = np.sign(p_u_amp) #palarity of the waveform
 
-    # add on time-dependent processed arrays
-    processed_df['current (A)'] = processed_df['voltage (V)']/50 # 50Ohm conversion, area correction, C/m^2 to uC/cm^2
-    processed_df['polarization (uC/cm^2)'] = cumulative_trapezoid(processed_df['current (A)'], processed_df['time (s)'], initial=0)/area*100
+    # time-dependent processed arrays
+    current, polarization = _pund_core(t, v, float(area))
 
-    N_t0 = np.searchsorted(processed_df['time (s)'].values, time_offset) # manual t0 specification
+    N_t0 = np.searchsorted(t, time_offset) # manual t0 specification
 
     if auto_timeshift:
-        threshold = np.std(processed_df[processed_df['time (s)'] < reset_width+reset_delay]['voltage (V)'].values*polarity)*0.3 # peak threshold is 30% of the RC discharge of the reset pulse
+        threshold = np.std(v[t < reset_width+reset_delay]*polarity)*0.3 # peak threshold is 30% of the RC discharge of the reset pulse
         distance = min([reset_delay, p_u_delay+p_u_width])/timestep*0.9 # peaks should never be closer than the minimum distance betweeen pulses
-        peaks, _ = find_peaks(-polarity*processed_df['voltage (V)'], height=threshold, distance=distance)
+        # only the first peak is used, so search up to the end of the first U pulse (plus one peak distance so a
+        # neighbouring peak just past the cut is still compared) and only scan the whole capture if nothing is found there
+        n_search = np.searchsorted(t, max(time_offset, 0) + reset_width + reset_delay + 2*p_u_width + p_u_delay) + int(distance) + 1
+        peaks, _ = find_peaks(-polarity*v[:n_search], height=threshold, distance=distance)
+        if len(peaks) == 0 and n_search < n_length:
+            peaks, _ = find_peaks(-polarity*v, height=threshold, distance=distance)
         try:
             first_peak = peaks[0]
-            v_at_first_peak = -polarity*processed_df['voltage (V)'].values[first_peak]
-            rc_rise = 0
-            for i in range(first_peak): # want to start pulse not at the peak voltage but at the beginning of the rise to the peak voltage
-                if -polarity*processed_df['voltage (V)'].values[first_peak-i] < v_at_first_peak*0.1:
-                    rc_rise = i
-                    break
+            v_at_first_peak = -polarity*v[first_peak]
+            # want to start pulse not at the peak voltage but at the beginning of the rise to the peak voltage,
+            # i.e. the first sample walking back from the peak (down to index 1) below 10% of it
+            below = -polarity*v[first_peak:0:-1] < v_at_first_peak*0.1
+            rc_rise = int(np.argmax(below)) if below.any() else 0
             N_t0 = first_peak - rc_rise
             time_offset = N_t0*timestep
         except:
             print('WARNING:INITIAL PEAK NOT FOUND, DEFAULTING TO MANUAL TIME OFFSET CORRECTION')
 
-        processed_df['time (s)'] = processed_df['time (s)'].values - processed_df['time (s)'].values[N_t0] # zero time correction
+        t = t - t[N_t0] # zero time correction
 
     # time to choppy chop the pund based on the extracted pulse widths and delays
-    n_ph = np.searchsorted(processed_df['time (s)'].values, reset_width+reset_delay)
-    n_phr = np.searchsorted(processed_df['time (s)'].values, reset_width+reset_delay+p_u_width)
-    n_ps = np.searchsorted(processed_df['time (s)'].values, reset_width+reset_delay+p_u_width+p_u_delay)
-    n_psr = np.searchsorted(processed_df['time (s)'].values, reset_width+reset_delay+2*p_u_width+p_u_delay)
-    try:
-        n_end = np.searchsorted(processed_df['time (s)'].values, reset_width+reset_delay+2*p_u_width+2*p_u_delay)
-    except:
-        n_end = len(processed_df)
-
-    ph = processed_df['polarization (uC/cm^2)'].values[n_ph:n_phr]
-    phr = processed_df['polarization (uC/cm^2)'].values[n_phr:n_ps]
-    ps = processed_df['polarization (uC/cm^2)'].values[n_ps:n_psr]
-    psr = processed_df['polarization (uC/cm^2)'].values[n_psr:n_end]
+    # all pulse edges in one lookup, an edge past the end of the capture lands at n_length
+    edges = reset_width + reset_delay + np.array([0, p_u_width, p_u_width+p_u_delay, 2*p_u_width+p_u_delay, 2*p_u_width+2*p_u_delay])
+    n_ph, n_phr, n_ps, n_psr, n_end = np.searchsorted(t, edges)
+
+    ph = polarization[n_ph:n_phr]
+    phr = polarization[n_phr:n_ps]
+    ps = polarization[n_ps:n_psr]
+    psr = polarization[n_psr:n_end]
 
     # homogenize lengths for array math
     ph = ph[:min(len(ph), len(ps))]
@@ -73,15 +103,16 @@ def process_raw_3pp(path:str, show_plots=False, save_plots=False, auto_timeshift
     dp = np.concatenate([ph, phr]) - np.concatenate([ps, psr]) # time dependent FE polarization is diff between p and u pulse polarizations
     array_dict = {'P^':ph, 'P*':ps, 'P^r':phr, 'P*r':psr, 'dP':dp} # this naming convention mimics the one set by Radiant
 
-    for key in array_dict.keys():
-        array_dict[key] -= array_dict[key][0] # zero polarizations
-        repeat_values = np.zeros(len(processed_df)-len(array_dict[key]))+array_dict[key][-1]
-        array_dict[key] = np.concatenate([array_dict[key], repeat_values]) # add repeat values to the end of arrays so they can be added to the dataframe
-        processed_df[key+' (uC/cm^2)'] = array_dict[key] # add analysys arrays to dataframe
+    # every analysis column is written into one preallocated block, no temporaries or concatenation per column
+    analysis = np.empty((len(array_dict), n_length))
+    for row, arr in zip(analysis, array_dict.values()):
+        np.subtract(arr, arr[0], out=row[:len(arr)]) # zero polarizations, the slices of polarization stay untouched
+        row[len(arr):] = row[len(arr)-1] # add repeat values to the end of arrays so they line up with the data
+    analysis_columns = {key+' (uC/cm^2)': row for key, row in zip(array_dict, analysis)}
 
     # create applied voltage array from nominal assumptions
     times = [0, reset_width, reset_delay, p_u_width, p_u_delay, p_u_width, p_u_delay,]
-    sum_times = [sum(times[:i+1]) for i, t in enumerate(times)]
+    sum_times = [sum(times[:i+1]) for i, t_i in enumerate(times)]
     # calculate full amplitude of pulse profile and fractional amps of pulses
 
     # specify sparse t and v coordinates which define PUND pulse train
@@ -94,39 +125,40 @@ def process_raw_3pp(path:str, show_plots=False, save_plots=False, auto_timeshift
 
     # densify the array, rise/fall times of pulses will be equal to the awg resolution
     v_applied = interpolate_sparse_to_dense(sparse_t, sparse_v, total_points=n_points)
-    initial_delay = np.zeros(int(time_offset//timestep))
-    v_applied = np.concatenate([initial_delay, v_applied])
-
-    if len(v_applied)<len(processed_df):
-        v_applied = np.concatenate([v_applied, np.zeros(len(processed_df) - len(v_applied))]) # make sure arrays are the same length
+    v_applied = place_waveform(v_applied, int(time_offset//timestep), n_length) # delayed by the time offset, one array as long as the data
 
-    processed_df['applied voltage (V)'] = v_applied[:len(processed_df)]
+    t = t - t[0] # make sure time starts at zero again
 
-    processed_df['time (s)'] = processed_df['time (s)'].values - processed_df['time (s)'].values[0] # make sure time starts at zero again
+    processed_columns = {'time (s)': t, 'current (A)': current, 'polarization (uC/cm^2)': polarization}
+    processed_columns.update(analysis_columns)
+    processed_columns['applied voltage (V)'] = v_applied
+    processed_df = raw_df.assign(**processed_columns)
 
     # optional plotting
     if show_plots or save_plots:
+        import matplotlib.pyplot as plt # only paid for when plotting, batch processing never loads matplotlib
+        stem = path[:-4] # saved plots sit next to the csv
         #dP vs time plot
         fig, ax = plt.subplots(tight_layout=True)
-        ax.plot(processed_df['time (s)'], processed_df['dP (uC/cm^2)'], color='k')
+        ax.plot(t, analysis_columns['dP (uC/cm^2)'], color='k')
         ax.set_xlabel('time (s)')
         ax.set_ylabel('dP (uC/cm^2)')
         if save_plots:
-            fig.savefig(path[:-4]+'_dPvst.png')
+            fig.savefig(stem+'_dPvst.png')
         if show_plots:
             plt.show()
         plt.close()
 
         #Current response and applied voltage trace plot
         fig, ax = plt.subplots(tight_layout=True)
-        ax.plot(processed_df['time (s)'], processed_df['current (A)'], color='k')
+        ax.plot(t, current, color='k')
         ax.set_xlabel('time (s)')
         ax.set_ylabel('current (A)')
         ax1 = ax.twinx()
-        ax1.plot(processed_df['time (s)'], processed_df['applied voltage (V)'], color='r')
+        ax1.plot(t, v_applied, color='r')
         ax1.set_ylabel('applied voltage (V)')
         if save_plots:
-            fig.savefig(path[:-4]+'_trace.png')
+            fig.savefig(stem+'_trace.png')
         if show_plots:
             plt.show()
         plt.close()
@@ -134,4 +166,5 @@ def process_raw_3pp(path:str, show_plots=False, save_plots=False, auto_timeshift
     metadata['time_offset'] = time_offset
     metadata['processed'] = True
     # update csv with new processed data
-    metadata_and_data_to_csv(metadata, processed_df, path)
\ No newline at end of file
+    metadata_and_data_to_csv(metadata, processed_df, path)
+    return metadata, processed_df
\ No newline at end of file
@@ -1,6 +1,11 @@
 import pandas as pd
 import numpy as np
 import os
+import io
+import csv
+import warnings
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
 ### FILE HANDLING CONVINIENCE FUNCTIONS ###
 
@@ -16,31 +21,105 @@ def metadata_and_data_to_csv(metadata, data, path):
     ***NOTE Made with help from ChatGPT LLM***
     """
 
-    metadata.to_csv(path, index=False, header=True)
+    # One open for both blocks, newline='' so pandas' own line endings and the blank line match a csv written by path
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        metadata.to_csv(f, index=False, header=True)
 
-    # Add a blank line to the CSV file
-    with open(path, 'a') as f:
-        f.write('\n')
+        # Add a blank line to the CSV file
+        f.write(os.linesep)
 
-    # Append data to the same CSV file with its own header
-    data.to_csv(path, mode='a', index=False, header=True)
+        # Append data to the same CSV file with its own header
+        data.to_csv(f, index=False, header=True)
 
-def standard_csv_to_metadata_and_data(path, metadata_header_row=0, data_header_row=2):
+def standard_csv_to_metadata_and_data(path, metadata_header_row=0, data_header_row=2, usecols=None, dtype=None):
     """
     Convenience function that takes the piec standard 1xN metadata with data below and returns each as individual dataframes
 
     :param path: path to save csv in
     :param metadata_header_row: row where metadata starts (defaut row 0)
     :param data_header_row:  row where data starts (defaut row 2)
+    :param usecols: optional list of data columns to parse, the others are skipped by the tokenizer (default all)
+    :param dtype: optional dtype for the parsed data columns, e.g. np.float64 to skip type inference (default inferred)
     """
+    # Read the file once and hand each block to pandas from memory
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    # Byte offset of the data header, counting non-blank lines like pandas does
+    offset = 0
+    header_rows = 0
+    while offset < len(raw):
+        end = raw.find(b'\n', offset)
+        end = len(raw) if end == -1 else end + 1
+        if raw[offset:end].strip():
+            if header_rows == data_header_row:
+                break
+            header_rows += 1
+        offset = end
+
     # Read metadata using its header row and assuming it has only one row of data
-    metadata = pd.read_csv(path, header=metadata_header_row, nrows=1)
+    metadata = pd.read_csv(io.BytesIO(raw[:offset]), header=metadata_header_row, nrows=1)
 
     # Read data starting from its header row and continuing to the end of the file
-    data = pd.read_csv(path, header=data_header_row)
+    data = pd.read_csv(io.BytesIO(raw[offset:]), header=0, usecols=usecols, dtype=dtype, engine="c")
 
     return metadata, data
 
+def standard_csv_metadata(path, metadata_header_row=0):
+    """
+    Reads the 1xN metadata block of a piec standard csv into a plain dict without going through pandas.
+    Values that parse as numbers are returned as floats, everything else is kept as the raw string
+
+    :param path: path of the csv to read
+    :param metadata_header_row: row where metadata starts (defaut row 0)
+    :return: dict mapping metadata column name to its value
+    """
+    with open(path, newline='') as f:
+        rows = csv.reader(line for i, line in enumerate(f) if i >= metadata_header_row)
+        header = next(rows)
+        values = next(rows, [])
+    metadata = {}
+    for key, value in zip(header, values):
+        try:
+            metadata[key] = float(value)
+        except ValueError:
+            metadata[key] = value
+    return metadata
+
+def standard_csv_columns(path, columns, data_header_row=2):
+    """
+    Fast path for reading only a few numeric data columns of a piec standard csv as float arrays.
+    The header is parsed once to resolve column indices and numpy only converts the requested columns,
+    so this is much cheaper than standard_csv_to_metadata_and_data for plotting
+
+    :param path: path of the csv to read
+    :param columns: iterable of data column names to read
+    :param data_header_row: row where data starts, counting non-blank lines like pandas (defaut row 2)
+    :return: dict mapping each requested column name to a 1D float array
+    """
+    columns = list(dict.fromkeys(columns)) # drop duplicates, e.g. same column on both axes
+    with open(path, newline='') as f:
+        header_rows = 0
+        for line in f:
+            if not line.strip():
+                continue
+            if header_rows == data_header_row:
+                header = next(csv.reader([line]))
+                break
+            header_rows += 1
+        else:
+            raise ValueError(f"No data header found in {path}")
+
+        missing = [col for col in columns if col not in header]
+        if missing:
+            raise KeyError(f"Columns {missing} not found in {path}")
+        indices = [header.index(col) for col in columns]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning) # header only file, e.g. a measurement that just started
+            values = np.loadtxt(f, delimiter=',', usecols=indices, ndmin=2, dtype=np.float64)
+    return {col: values[:, i] for i, col in enumerate(columns)}
+
 def create_measurement_filename(directory, measurement_type, notes="", type="csv"):
     """
     Creates a unique filename for a measurement file by checking for identical filenames
@@ -58,28 +137,26 @@ def create_measurement_filename(directory, measurement_type, notes="", type="csv
 
     ***NOTE Made with help from ChatGPT LLM***
     """
-    # Ensure the directory exists
-    os.makedirs(directory, exist_ok=True)
-    
     # Construct the base filename
     base_filename = f"{measurement_type}_{notes}.{type}"
     
+    # List the directory once instead of a stat per candidate index (normcase for case-insensitive filesystems),
+    # it only has to be created when that listing finds it missing
+    try:
+        with os.scandir(directory) as entries:
+            existing = {os.path.normcase(entry.name) for entry in entries}
+    except FileNotFoundError:
+        os.makedirs(directory, exist_ok=True)
+        existing = set()
+
     # Initialize index
     index = 0
     
-    # Loop to find a unique filename
-    while True:
-        # Construct the full filepath
-        filename = os.path.join(directory, f"{index}_{base_filename}")
-        
-        # Check if the file already exists
-        if not os.path.exists(filename):
-            break
-        
-        # Increment the index if the file exists
+    # Loop to find a unique filename, incrementing the index while the name is taken
+    while os.path.normcase(f"{index}_{base_filename}") in existing:
         index += 1
     
-    return filename
+    return os.path.join(directory, f"{index}_{base_filename}")
 
 ### ARBITRARY WAVEFORM CONVINIENCE FUNCTIONS ###
 
@@ -98,24 +175,65 @@ def interpolate_sparse_to_dense(x_sparse, y_sparse, total_points=100):
 
     ***NOTE Made with help from ChatGPT LLM***
     """
-    y_dense = []
-
-    # Iterate through each pair of adjacent sparse points
-    for i in range(len(x_sparse) - 1):
-        # Get the start and end points
-        x_start, x_end = x_sparse[i], x_sparse[i + 1]
-        y_start, y_end = y_sparse[i], y_sparse[i + 1]
-        
-        # Generate interpolated points between y_start and y_end
-        n_to_interpolate = int(((x_sparse[i + 1]-x_sparse[i])/max(x_sparse))*total_points)
-        y_interp = np.linspace(y_start, y_end, n_to_interpolate, endpoint=False)
-        
-        # Append the interpolated points
-        y_dense.extend(y_interp)
+    x_sparse = np.asarray(x_sparse, dtype=np.float64)
+    y_sparse = np.asarray(y_sparse, dtype=np.float64)
+
+    # Number of points each segment contributes, then which segment and which step within it every dense point is
+    counts = (np.diff(x_sparse)/np.max(x_sparse)*total_points).astype(int)
+    segment = np.repeat(np.arange(len(counts)), counts)
+    step_index = np.arange(len(segment)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    # Same values np.linspace(y_start, y_end, n, endpoint=False) gives for each segment, in one pass
+    y_dense = y_sparse[:-1][segment] + step_index*(np.diff(y_sparse)[segment]/counts[segment])
 
     #add on duplicate points at the end to ensure array length == total_points (make up for int rounding error)
-    while len(y_dense) < total_points:
-        y_dense.append(y_dense[-1])
+    if len(y_dense) < total_points:
+        y_dense = np.concatenate([y_dense, np.full(total_points - len(y_dense), y_dense[-1])])
+
+    return y_dense
 
-    return np.array(y_dense)
+def place_waveform(waveform, n_delay, n_length):
+    """
+    Writes waveform into a zero array of n_length samples starting at sample n_delay, cutting off whatever does not fit.
+    A negative n_delay drops that many leading samples instead (capture started after the waveform did).
 
+    Parameters:
+    - waveform (array-like): nominal waveform samples.
+    - n_delay (int): number of zero samples before the waveform starts.
+    - n_length (int): length of the returned array, e.g. the number of captured samples.
+
+    Returns:
+    - placed (numpy array): n_length samples, zeros outside the waveform.
+    """
+    waveform = np.asarray(waveform)[max(-n_delay, 0):]
+    start = min(max(n_delay, 0), n_length)
+    n_write = min(len(waveform), n_length - start)
+    placed = np.zeros(n_length)
+    placed[start:start + n_write] = waveform[:n_write]
+    return placed
+
+### BATCH PROCESSING CONVINIENCE FUNCTIONS ###
+
+def _use_agg_backend():
+    """Worker initializer, plots saved from worker processes never need (or may not open) a GUI backend"""
+    import matplotlib
+    matplotlib.use('Agg')
+
+def process_files(paths, processor, max_workers=None, **kwargs):
+    """
+    Runs processor (e.g. process_raw_hyst or process_raw_3pp) on every csv in paths using a pool of worker processes.
+    Each file is processed independently, so a folder of measurements scales with the number of cores.
+    On Windows call this from under an if __name__ == "__main__": guard, the workers re-import the calling script
+
+    Parameters:
+    - paths (iterable of str): csv files to process.
+    - processor (callable): module level processing function taking the path as its first argument.
+    - max_workers (int): number of worker processes, defaults to the number of CPUs.
+    - **kwargs: passed on to processor for every file, e.g. save_plots=True. show_plots is not supported in workers.
+
+    Returns:
+    - results (list): processor's return value for each path, in the order of paths.
+    """
+    initializer = _use_agg_backend if kwargs.get('save_plots') else None
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=initializer) as executor:
+        return list(executor.map(partial(processor, **kwargs), paths))
@@ -1,6 +1,7 @@
 """
 An awg (arbitrary waveform generator) is defined as an instrument that has the typical features on expects an awg to have
 """
+import threading
 from ..instrument import Instrument
 
 class Awg(Instrument):
@@ -219,6 +220,67 @@ class Awg(Instrument):
             name (str): The name of the arbitrary waveform to be set
         """
 
+    #double buffered arb uploads, built on create_arb_waveform/set_arb_waveform
+    _ARB_PAGES = ('PIEC_PAGE0', 'PIEC_PAGE1')
+
+    def __init__(self, address, **kwargs):
+        super().__init__(address, **kwargs)
+        self._init_arb_pages()
+
+    def _init_arb_pages(self):
+        """Per instance double buffer state: channel -> index of the playing page, channel -> (page, done Event, errors) of an upload"""
+        self._arb_active = {}
+        self._arb_pending = {}
+
+    def preload_arb_waveform(self, channel, data):
+        """
+        Uploads data into the inactive arb page on a background thread while the active page keeps playing.
+        Call swap_arb_waveform to switch to it. The instrument session must not be used in between,
+        the upload owns it until swap_arb_waveform (or wait_arb_upload) returns.
+        args:
+            channel (int): The channel the waveform is for
+            data (list or ndarray): The data points of the arbitrary waveform
+        """
+        self.wait_arb_upload(channel) # only one upload per channel may be in flight
+        page = self._ARB_PAGES[1 - self._arb_active.get(channel, 1)]
+        done = threading.Event()
+        errors = [] # an exception on the upload thread is handed to whoever waits for it
+
+        def upload():
+            try:
+                self.create_arb_waveform(channel, page, data)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                done.set()
+        threading.Thread(target=upload, daemon=True).start()
+        self._arb_pending[channel] = (page, done, errors)
+
+    def wait_arb_upload(self, channel):
+        """
+        Blocks until the pending preload for channel (if any) has finished and returns its page name.
+        If the upload failed its exception is raised here, so a page that was never (fully) written is not used
+        """
+        if channel not in self._arb_pending:
+            return None
+        page, done, errors = self._arb_pending.pop(channel)
+        done.wait()
+        if errors:
+            raise errors[0]
+        return page
+
+    def swap_arb_waveform(self, channel):
+        """
+        Waits for the pending preload on channel and switches the output to that page,
+        the previously playing page becomes the target of the next preload
+        """
+        page = self.wait_arb_upload(channel)
+        if page is None:
+            print(f"Warning: No preloaded arb waveform for channel {channel}")
+            return
+        self.set_arb_waveform(channel, page)
+        self._arb_active[channel] = self._ARB_PAGES.index(page)
+
     #trigger and sync functions
     def set_trigger_source(self, channel, trigger_source):
         """
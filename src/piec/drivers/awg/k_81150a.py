@@ -38,6 +38,7 @@ class Keysight81150a(Awg, Scpi):
     arb_data_range = (2, 524288)
     #instrument specific attributes
     amplifier_type = ['HIV', 'HIB'] #HIV (high voltage), HIB (high bandwidth)
+    supports_compound_commands = True
 
     def __init__(self, address, **kwargs):
         """
@@ -468,7 +469,7 @@ def scale_waveform_data(data: np.array, preserve_vertical_resolution: bool=False
         total = 8191*2 + 1
         loss = 100* (abs(np.max(scaled_data)) + abs(np.min(scaled_data)))/total
         print("Estimated Peak-to-Peak Ratio of targeted value is {:.1f}%".format(loss))
-        return scaled_data.astype(np.int32)
+        return scaled_data.astype(np.int16) # DAC codes fit in 14 bits, sent as 'h' without another conversion
 
 def ask_user_to_select(options):
         """
@@ -1,5 +1,4 @@
 import numpy as np
-import struct
 from .awg import Awg
 from ..scpi import Scpi
 
@@ -231,9 +230,11 @@ class SDG2000X(Awg, Scpi):
         # Convert data to binary (Little endian, 16-bit 2's complement) as per Python Example 4.1.5
         # Example 4.1.5 converts values to hex strings then bytes, but direct packing is more efficient.
         if isinstance(data, (list, tuple, np.ndarray)):
-            # Ensure data consists of integers
-            data = [int(x) for x in data]
-            binary_data = b''.join([struct.pack('<h', x) for x in data])
+            # Ensure data consists of integers, truncated like int() and packed in one go
+            data = np.trunc(np.asarray(data, dtype=np.float64))
+            if data.size and (data.min() < -32768 or data.max() > 32767):
+                raise ValueError("Arbitrary waveform data must fit in 16-bit signed integers")
+            binary_data = data.astype('<i2').tobytes()
         else:
             binary_data = data 
 
@@ -57,6 +57,7 @@ class VirtualAwg(VirtualInstrument, Awg, Scpi):
             address (str, optional): Virtual address for the instrument. Defaults to '123'.
         """
         VirtualInstrument.__init__(self, address=address)
+        self._init_arb_pages() # Awg.__init__ is not reached through VirtualInstrument.__init__
 
         self.instrument = self
         
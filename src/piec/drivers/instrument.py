@@ -8,6 +8,7 @@ automatic parameter validation and state tracking.
 import functools
 import inspect
 import time
+import types
 import re
 import json
 import os
@@ -73,7 +74,7 @@ def auto_check_params(func):
 
         # 2. --- STATE-TRACKING LOGIC ---
         #    This code only runs if the function call above SUCCEEDED.
-        class_attr_keys = recursive_lower(get_class_attributes_from_instance(self)).keys()
+        class_attr_keys = _lower_class_attribute_keys(self.__class__)
         
         for key, value in lower_params.items():
             if key in class_attr_keys and value is not None:
@@ -209,14 +210,26 @@ def is_value_between(value, num_tuple):
 def get_matching_keys(dict1, dict2):
     return list(set(dict1.keys()).intersection(dict2.keys()))
 
-def get_class_attributes_from_instance(instance):
-    cls = instance.__class__
+@functools.lru_cache(maxsize=None)
+def _class_attributes(cls):
+    """
+    Walks the MRO of cls once and caches the resulting attribute table, since the
+    decorator and _check_params need it on every public method call. The table is shared
+    by every instance of cls, so it is handed out as a read-only view.
+    """
     attributes = {}
     for base in reversed(cls.__mro__):
         attributes.update({attr: getattr(base, attr) 
                            for attr in base.__dict__ 
                            if not callable(getattr(base, attr)) and not attr.startswith("__")})
-    return attributes
+    return types.MappingProxyType(attributes)
+
+@functools.lru_cache(maxsize=None)
+def _lower_class_attribute_keys(cls):
+    return frozenset(recursive_lower(dict(_class_attributes(cls))).keys())
+
+def get_class_attributes_from_instance(instance):
+    return _class_attributes(instance.__class__)
 
 def recursive_lower(obj):
     if isinstance(obj, str): return obj.lower()
@@ -35,6 +35,17 @@ class KeysightDSOX3024a(Oscilloscope, Scpi):
     acquisition_mode = ["NORM", "AVER", "HRES", "PEAK"]
     acquisition_points = (100, 8000000)
 
+    supports_compound_commands = True
+    wf_chunk_size = 1 << 20 # bytes per VISA read, a full 8 Mpt record is pulled in a few reads instead of hundreds of 20 kB ones
+
+    def __init__(self, address, **kwargs):
+        """
+        Opens the scope with a large read chunk so waveform transfers need few VISA calls.
+        Explicit kwargs take priority over these defaults.
+        """
+        kwargs.setdefault('chunk_size', self.wf_chunk_size)
+        super().__init__(address, **kwargs)
+
     def autoscale(self):
         """
         Autoscales the oscilloscope
@@ -324,20 +335,17 @@ class KeysightDSOX3024a(Oscilloscope, Scpi):
             is_unsigned = True
         else:
             if preamble_dict["format"] == 0 and not is_unsigned:
-                data = self.instrument.query_binary_values("WAVeform:DATA?", datatype='b', is_big_endian=is_big_endian)
+                data = self.instrument.query_binary_values("WAVeform:DATA?", datatype='b', is_big_endian=is_big_endian, container=np.array)
             if preamble_dict["format"] == 0 and is_unsigned:
-                data = self.instrument.query_binary_values("WAVeform:DATA?", datatype='B', is_big_endian=is_big_endian)
+                data = self.instrument.query_binary_values("WAVeform:DATA?", datatype='B', is_big_endian=is_big_endian, container=np.array)
             if preamble_dict["format"] == 1 and not is_unsigned:
-                data = self.instrument.query_binary_values("WAVeform:DATA?", datatype='h', is_big_endian=is_big_endian)
+                data = self.instrument.query_binary_values("WAVeform:DATA?", datatype='h', is_big_endian=is_big_endian, container=np.array)
             if preamble_dict["format"] == 1 and is_unsigned:
-                data = self.instrument.query_binary_values("WAVeform:DATA?", datatype='H', is_big_endian=is_big_endian)
+                data = self.instrument.query_binary_values("WAVeform:DATA?", datatype='H', is_big_endian=is_big_endian, container=np.array)
             if preamble_dict["format"] == 4:
                 data = self.instrument.query_ascii_values("WAVeform:DATA?")
-            time = []
-            wfm = []
-            for t in range(preamble_dict["points"]):
-                time.append((t* preamble_dict["x_increment"]) + preamble_dict["x_origin"])
-            for d in data:
-                wfm.append((d * preamble_dict["y_increment"]) + preamble_dict["y_origin"])
+            # scale the whole record at once instead of per sample
+            time = np.arange(preamble_dict["points"]) * preamble_dict["x_increment"] + preamble_dict["x_origin"]
+            wfm = np.asarray(data, dtype=np.float64) * preamble_dict["y_increment"] + preamble_dict["y_origin"]
         
         return pd.DataFrame({'Time': time, 'Voltage': wfm})
\ No newline at end of file
@@ -6,9 +6,15 @@ inheriting from generic Oscilloscope and Scpi classes.
 
 import numpy as np
 import pandas as pd
+import pyvisa
 from .oscilloscope import Oscilloscope
 from ..scpi import Scpi
-import struct
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, the sample scaling falls back to in-place numpy ufuncs
+    njit = None
 
 class LeCroySDA6020(Oscilloscope, Scpi):
     """
@@ -35,6 +41,33 @@ class LeCroySDA6020(Oscilloscope, Scpi):
     acquisition_mode = ["NORM"]
     acquisition_points = (1, 100000000)
 
+    wf_chunk_size = 1 << 20 # bytes per VISA read when pulling waveform blocks
+    wf_buffer_size = 1 << 22 # initial size of the persistent per-channel waveform buffers
+    _wf_bufs = None
+
+    def __init__(self, address, **kwargs):
+        """
+        Opens the scope with explicit session settings so pyvisa does not have to probe for them,
+        and disables Nagle on TCPIP sessions so short SCPI queries are not held back by the socket.
+        Explicit kwargs take priority over these defaults.
+        """
+        kwargs.setdefault('timeout', 5000)
+        kwargs.setdefault('chunk_size', self.wf_chunk_size)
+        kwargs.setdefault('read_termination', '\n')
+        kwargs.setdefault('write_termination', '\n')
+        super().__init__(address, **kwargs)
+
+        if not self.virtual and address.upper().startswith('TCPIP'):
+            try:
+                self.instrument.set_visa_attribute(pyvisa.constants.VI_ATTR_TCPIP_NODELAY, pyvisa.constants.VI_TRUE)
+            except Exception as e:
+                print(f"Warning: Could not enable TCP_NODELAY on {address}: {e}")
+
+    def close(self):
+        """Closes this scope's session, the shared ResourceManager stays open for other instruments"""
+        if hasattr(self.instrument, 'close'):
+            self.instrument.close()
+
     def autoscale(self):
         """
         Autoscales the oscilloscope
@@ -211,6 +244,25 @@ class LeCroySDA6020(Oscilloscope, Scpi):
         """
         self.instrument.write("ARM")
 
+    def wait_complete(self, timeout=None):
+        """
+        Blocks until the armed acquisition has finished using one WAIT + *OPC? round-trip instead of polling.
+        WAIT is sent as its own write so the *OPC? reply only comes back once the acquisition is done.
+
+        args:
+            timeout (float): Maximum time in seconds to wait, defaults to the current VISA timeout
+        """
+        if self.virtual:
+            return
+        old_timeout = self.instrument.timeout
+        if timeout is not None:
+            self.instrument.timeout = timeout * 1000 + 1000 # VISA timeout is in ms, leave 1 s for the reply
+        try:
+            self.instrument.write("WAIT" if timeout is None else f"WAIT {timeout}")
+            self.instrument.query("*OPC?")
+        finally:
+            self.instrument.timeout = old_timeout
+
     def set_acquisition(self):
         """
         Prepares the acquisition
@@ -253,39 +305,140 @@ class LeCroySDA6020(Oscilloscope, Scpi):
         raw_data = self.instrument.query_binary_values(f"C{channel}:WF? DAT1", datatype='h', is_big_endian=False)
         return np.array(raw_data)
 
+    def query_wf(self, channel=1, block="DAT1"):
+        """
+        Reads the raw waveform block(s) for one or more channels in a single transfer.
+        All channel queries are sent as one compound command and the concatenated
+        IEEE 488.2 blocks are read back in large chunks, so N channels cost one round-trip.
+
+        args:
+            channel (int or list): The channel (or channels) to read
+            block (str): The waveform block to request, e.g. DAT1, DESC or ALL
+        returns:
+            memoryview for a single channel, or a list of memoryviews in channel order.
+            The views share persistent buffers and are only valid until the next query_wf call.
+        """
+        channels = [channel] if isinstance(channel, (int, str)) else list(channel)
+        self.instrument.chunk_size = max(self.instrument.chunk_size, self.wf_chunk_size)
+        # COMM_HEADER OFF leads the same write so every response starts directly at its '#' block header
+        self.instrument.write(";".join(["COMM_HEADER OFF"] + [f"C{ch}:WF? {block}" for ch in channels]))
+        blocks = [self._read_block(i) for i in range(len(channels))]
+        return blocks[0] if len(blocks) == 1 else blocks
+
+    def _read_block(self, slot=0):
+        """
+        Reads one #<n><len><data> definite length block into the persistent buffer for the given slot.
+        The buffer is only reallocated when a block outgrows it, so repeated acquisitions do not allocate.
+        Response headers are off (see query_wf), so the block starts right at its '#<n>' prefix.
+        """
+        prefix = self.instrument.read_bytes(2)
+        if prefix[:1] != b"#" or not prefix[1:].isdigit():
+            raise ValueError(f"Expected a '#<n>' block header from {self.__class__.__name__}, got {bytes(prefix)!r}")
+        length = int(self.instrument.read_bytes(int(prefix[1:])))
+
+        if self._wf_bufs is None:
+            self._wf_bufs = []
+        while len(self._wf_bufs) <= slot:
+            self._wf_bufs.append(bytearray(self.wf_buffer_size))
+        if len(self._wf_bufs[slot]) < length:
+            self._wf_bufs[slot] = bytearray(length)
+        view = memoryview(self._wf_bufs[slot])[:length]
+        pos = 0
+        while pos < length:
+            chunk = self.instrument.read_bytes(min(self.wf_chunk_size, length - pos), break_on_termchar=False)
+            view[pos:pos + len(chunk)] = chunk
+            pos += len(chunk)
+        self.instrument.read_bytes(1) # consume the ';' separator or the terminating newline
+        return view
+
     def get_data(self, channel=1):
         """
         Returns the data in a Pandas Dataframe.
+        The descriptor and samples are fetched together with one WF? ALL transfer and
+        parsed by parse_wf, so no per-sample Python work is done.
         """
         self.set_acquisition()
-        
-        # LeCroy waveform descriptors contain necessary scaling factors
-        self.instrument.write("COMM_HEADER OFF")
-        desc = self.instrument.query_binary_values(f"C{channel}:WF? DESC", datatype='B')
-        
-        # Very simplified parsing of the waveform descriptor based on LeCroy manual
-        # Real world LeCroy driver parsing is substantially more involved, requiring struct unpacking of the 346 byte descriptor
-        # This is a structural placeholder that attempts to grab basic scaling
-        v_gain = 1.0
-        v_offset = 0.0
-        h_gain = 1.0
-        h_offset = 0.0
-        
-        try:
-            # Bytes 156-159: vertical gain
-            v_gain = struct.unpack('f', bytes(desc[156:160]))[0]
-            # Bytes 160-163: vertical offset
-            v_offset = struct.unpack('f', bytes(desc[160:164]))[0]
-            # Bytes 176-179: horizontal interval
-            h_gain = struct.unpack('f', bytes(desc[176:180]))[0]
-            # Bytes 180-187: horizontal offset
-            h_offset = struct.unpack('d', bytes(desc[180:188]))[0]
-        except Exception:
-            print("Warning: Could not fully parse LeCroy waveform descriptor. Data will be unscaled raw ADC values.")
 
-        raw_data = self.instrument.query_binary_values(f"C{channel}:WF? DAT1", datatype='h', is_big_endian=False)
-        
-        v_data = (np.array(raw_data) * v_gain) - v_offset
-        t_data = (np.arange(len(v_data)) * h_gain) + h_offset
-        
+        if self.virtual:
+            raw_data = self.instrument.query_binary_values(f"C{channel}:WF? DAT1", datatype='h', is_big_endian=False)
+            v_data = np.asarray(raw_data, dtype=np.float32)
+            return pd.DataFrame({'Time': np.arange(len(v_data), dtype=np.float64), 'Voltage': v_data})
+
+        t_data, v_data = parse_wf(self.query_wf(channel, block="ALL"))
         return pd.DataFrame({'Time': t_data, 'Voltage': v_data})
+
+#Helper Functions
+# Layout of the LeCroy WAVEDESC block (template LECROY_2_3), 346 bytes
+WAVEDESC_DTYPE = np.dtype([
+    ('descriptor_name', 'S16'), ('template_name', 'S16'),
+    ('comm_type', '<i2'), ('comm_order', '<i2'),
+    ('wave_descriptor', '<i4'), ('user_text', '<i4'), ('res_desc1', '<i4'),
+    ('trigtime_array', '<i4'), ('ris_time_array', '<i4'), ('res_array1', '<i4'),
+    ('wave_array_1', '<i4'), ('wave_array_2', '<i4'), ('res_array2', '<i4'), ('res_array3', '<i4'),
+    ('instrument_name', 'S16'), ('instrument_number', '<i4'), ('trace_label', 'S16'),
+    ('reserved1', '<i2'), ('reserved2', '<i2'),
+    ('wave_array_count', '<i4'), ('pnts_per_screen', '<i4'),
+    ('first_valid_pnt', '<i4'), ('last_valid_pnt', '<i4'), ('first_point', '<i4'),
+    ('sparsing_factor', '<i4'), ('segment_index', '<i4'), ('subarray_count', '<i4'),
+    ('sweeps_per_acq', '<i4'), ('points_per_pair', '<i2'), ('pair_offset', '<i2'),
+    ('vertical_gain', '<f4'), ('vertical_offset', '<f4'), ('max_value', '<f4'), ('min_value', '<f4'),
+    ('nominal_bits', '<i2'), ('nom_subarray_count', '<i2'),
+    ('horiz_interval', '<f4'), ('horiz_offset', '<f8'), ('pixel_offset', '<f8'),
+    ('vertunit', 'S48'), ('horunit', 'S48'), ('horiz_uncertainty', '<f4'),
+    ('trigger_time', 'V16'), ('acq_duration', '<f4'),
+    ('record_type', '<i2'), ('processing_done', '<i2'), ('reserved5', '<i2'), ('ris_sweeps', '<i2'),
+    ('timebase', '<i2'), ('vert_coupling', '<i2'), ('probe_att', '<f4'),
+    ('fixed_vert_gain', '<i2'), ('bandwidth_limit', '<i2'),
+    ('vertical_vernier', '<f4'), ('acq_vert_offset', '<f4'), ('wave_source', '<i2'),
+])
+
+def _scale_samples_numpy(raw, gain, offset, out):
+    """Scales raw ADC counts to volts into out using in-place ufuncs (no temporaries)"""
+    np.multiply(raw, gain, out=out, casting='unsafe')
+    out -= offset
+    return out
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _scale_samples(raw, gain, offset, out):
+        """Scales raw ADC counts to volts into out in a single fused loop"""
+        for i in range(raw.shape[0]):
+            out[i] = raw[i] * gain - offset
+        return out
+else:
+    _scale_samples = _scale_samples_numpy
+
+def parse_wf(buf, out=None):
+    """
+    Parses a raw LeCroy waveform block (as returned by query_wf with block='ALL') into scaled arrays.
+    The WAVEDESC header is mapped with a single structured dtype and the samples are scaled in one vectorized pass.
+
+    args:
+        buf (bytes-like): Raw waveform block containing the WAVEDESC header followed by the sample array
+        out (np.ndarray): Optional float32 array reused for the voltages when it has the right length
+    returns:
+        (t_data, v_data): time (s) as float64 and voltage (V) as float32 numpy arrays
+    """
+    off = bytes(buf[:64]).find(b'WAVEDESC') # descriptor sits right after any response prefix
+    if off < 0:
+        raise ValueError("No WAVEDESC block found in waveform data")
+
+    dtype = WAVEDESC_DTYPE
+    if np.frombuffer(buf, dtype='<i2', count=1, offset=off + 34)[0] == 0: # COMM_ORDER 0 is big endian (HIFIRST)
+        dtype = dtype.newbyteorder('>')
+    hdr = np.frombuffer(buf, dtype=dtype, count=1, offset=off)[0]
+
+    sample_type = np.dtype('i1' if hdr['comm_type'] == 0 else 'i2').newbyteorder(dtype['comm_type'].byteorder)
+    data_off = off + int(hdr['wave_descriptor']) + int(hdr['user_text']) + int(hdr['trigtime_array']) + int(hdr['ris_time_array'])
+    n = int(hdr['wave_array_1']) // sample_type.itemsize
+    raw = np.frombuffer(buf, dtype=sample_type, count=n, offset=data_off)
+
+    if out is None or out.shape != (n,) or out.dtype != np.float32:
+        out = np.empty(n, dtype=np.float32)
+    gain, offset = np.float32(hdr['vertical_gain']), np.float32(hdr['vertical_offset'])
+    if raw.dtype.isnative:
+        v_data = _scale_samples(raw, gain, offset, out)
+    else:
+        v_data = _scale_samples_numpy(raw, gain, offset, out) # numba only handles native byte order
+    t_data = np.arange(n, dtype=np.float64) * float(hdr['horiz_interval']) + float(hdr['horiz_offset'])
+    return t_data, v_data
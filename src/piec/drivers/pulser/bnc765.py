@@ -1,6 +1,7 @@
 import time
 from .pulser import Pulser
 from ..scpi import Scpi
+from ..instrument import convert_to_lowercase
 
 class BNC765(Pulser, Scpi):
     """
@@ -25,29 +26,67 @@ class BNC765(Pulser, Scpi):
     burst_count = (1, 1000000)
     polarity = ['NORM', 'INV']
 
+    # SCPI for the parameters apply() can batch, high/low level need queries so they are set separately
+    _SCPI_MAP = {
+        'period': lambda ch, v: f"SOURce{ch}:FREQuency {1.0 / v}",
+        'frequency': lambda ch, v: f"SOURce{ch}:FREQuency {v}",
+        'width': lambda ch, v: f"SOURce{ch}:PULSe:WIDTh {v}",
+        'delay': lambda ch, v: f"SOURce{ch}:PULSe:DELay {v}",
+        'rise_time': lambda ch, v: f"SOURce{ch}:PULSe:TRANsition:LEADing {v}",
+        'fall_time': lambda ch, v: f"SOURce{ch}:PULSe:TRANsition:TRAiling {v}",
+        'offset': lambda ch, v: f"SOURce{ch}:VOLTage:OFFSet {v}",
+        'burst_count': lambda ch, v: f"SOURce{ch}:BURSt:NCYCles {v}",
+        'polarity': lambda ch, v: f"SOURce{ch}:INVert {'ON' if v.upper() == 'INV' else 'OFF'}",
+    }
+
+    def apply(self, channel, **params):
+        """
+        Sets several pulse parameters of a channel with a single compound SCPI write,
+        e.g. apply(1, period=1e-3, width=1e-6, delay=0). high_level and low_level are
+        applied afterwards with their own setters since they depend on the current state.
+        Parameters passed as None are left unchanged.
+        """
+        params = convert_to_lowercase(params)
+        if self.check_params:
+            self._check_params(self, params) # channel is already checked by the AutoCheckMeta wrapper, which cannot see into **params
+        self._apply(channel, params)
+
+    def _apply(self, channel, params):
+        """Unchecked body of apply, the set_* methods call it directly since their wrapper already validated them"""
+        params = {key: value for key, value in params.items() if value is not None}
+        batched = [self._SCPI_MAP[key](channel, value) for key, value in params.items() if key in self._SCPI_MAP]
+        if batched:
+            self.instrument.write(";:".join(batched))
+        for key in ('high_level', 'low_level'):
+            if key in params:
+                getattr(self, f"set_{key}")(channel, params[key])
+
+        for key, value in params.items():
+            setattr(self, f"_current_{key}", value)
+
     def set_period(self, channel, period):
         """Sets the period of the pulse"""
-        self.instrument.write(f"SOURce{channel}:FREQuency {1.0 / period}")
+        self._apply(channel, {'period': period})
 
     def set_frequency(self, channel, frequency):
         """Sets the frequency of the pulse"""
-        self.instrument.write(f"SOURce{channel}:FREQuency {frequency}")
+        self._apply(channel, {'frequency': frequency})
 
     def set_width(self, channel, width):
         """Sets the width of the pulse"""
-        self.instrument.write(f"SOURce{channel}:PULSe:WIDTh {width}")
+        self._apply(channel, {'width': width})
 
     def set_delay(self, channel, delay):
         """Sets the delay before the pulse starts"""
-        self.instrument.write(f"SOURce{channel}:PULSe:DELay {delay}")
+        self._apply(channel, {'delay': delay})
 
     def set_rise_time(self, channel, rise_time):
         """Sets the rise time of the pulse"""
-        self.instrument.write(f"SOURce{channel}:PULSe:TRANsition:LEADing {rise_time}")
+        self._apply(channel, {'rise_time': rise_time})
 
     def set_fall_time(self, channel, fall_time):
         """Sets the fall time of the pulse"""
-        self.instrument.write(f"SOURce{channel}:PULSe:TRANsition:TRAiling {fall_time}")
+        self._apply(channel, {'fall_time': fall_time})
 
     def set_high_level(self, channel, high_level):
         """Sets the high level of the pulse"""
@@ -75,7 +114,7 @@ class BNC765(Pulser, Scpi):
 
     def set_offset(self, channel, offset):
         """Sets the offset of the pulse"""
-        self.instrument.write(f"SOURce{channel}:VOLTage:OFFSet {offset}")
+        self._apply(channel, {'offset': offset})
 
     def output(self, channel, on=True):
         """Turns the pulse output on or off for the specified channel"""
@@ -96,9 +135,8 @@ class BNC765(Pulser, Scpi):
         
     def set_burst_count(self, channel, count):
         """Sets the number of pulses in a burst"""
-        self.instrument.write(f"SOURce{channel}:BURSt:NCYCles {count}")
+        self._apply(channel, {'burst_count': count})
 
     def set_polarity(self, channel, polarity):
         """Sets the polarity of the pulse output"""
-        state = "ON" if polarity.upper() == 'INV' else "OFF"
-        self.instrument.write(f"SOURce{channel}:INVert {state}")
+        self._apply(channel, {'polarity': polarity})
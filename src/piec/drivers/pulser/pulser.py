@@ -86,4 +86,13 @@ class Pulser(Instrument):
         """
         Sets the polarity of the pulse output (e.g., normal, inverted)
         """
+    #batched configuration
+    def apply(self, channel, **params):
+        """
+        Sets several pulse parameters of a channel at once, e.g. apply(1, width=1e-6, delay=0).
+        Drivers that can should override this to send everything as one compound command,
+        by default each set_<param> method is called in turn
+        """
+        for key, value in params.items():
+            getattr(self, f"set_{key}")(channel, value)
     
\ No newline at end of file
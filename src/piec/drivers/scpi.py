@@ -1,8 +1,47 @@
 """
 This is the top level instrument that dictates if something is scpi, dac, arduino, etc.
 """
+import contextlib
 from .instrument import Instrument # Assuming instrument.py is in the same directory
 
+def compound_command(commands):
+    """
+    Joins SCPI commands into one compound program message. Each non-common command is rooted
+    with a leading ':' so it does not inherit the header path of the command before it.
+    """
+    rooted = [cmd if cmd.startswith((':', '*')) else ':' + cmd for cmd in (c.strip() for c in commands)]
+    return ';'.join(rooted)
+
+class _BatchedWrites:
+    """
+    Stands in for the VISA resource inside Scpi.batch(). Writes are buffered, anything else
+    (a query, a binary transfer, ...) first flushes the buffer so ordering on the bus is kept.
+    A setting written again before the flush (same header, e.g. ':CHAN1:SCAL') replaces the
+    earlier value in place, so only the latest value goes out, at the position of the first write.
+    Common commands and argument-less commands (actions like *TRG or :SINGle) are always sent.
+    """
+    def __init__(self, instrument):
+        self._instrument = instrument
+        self._commands = {} # key -> command, insertion order is send order
+
+    def write(self, command):
+        header, _, argument = command.strip().partition(' ')
+        if argument and not header.startswith('*'):
+            key = header.lstrip(':').lower() # assigning an existing key keeps its place, coalescing keeps first-write order
+        else:
+            key = object() # unique, never coalesced
+        self._commands[key] = command
+
+    def flush(self):
+        if self._commands:
+            commands, self._commands = list(self._commands.values()), {}
+            self._instrument.write(compound_command(commands))
+            self._instrument.query("*OPC?")
+
+    def __getattr__(self, name):
+        self.flush()
+        return getattr(self._instrument, name)
+
 class Scpi(Instrument):
     # Initializer / Instance attributes
     """
@@ -10,6 +49,7 @@ class Scpi(Instrument):
     This is taken from scpi-99 standard and includes the IEEE Mandated Commands
     https://www.ivifoundation.org/downloads/SCPI/scpi-99.pdf
     """
+    supports_compound_commands = False # set on drivers whose instrument accepts ';' joined program messages
     def __init__(self, address, **kwargs):
         """
         Opens the instrument and enables communication with it. In the case of SCPI, this is usually done over GPIB if possible, or USB, or Ethernet.
@@ -74,6 +114,43 @@ class Scpi(Instrument):
         """
         return self.instrument.query("*OPC?")
     
+    def batch_write(self, commands):
+        """
+        Sends several commands with one bus round-trip (a ';' joined compound message) followed by
+        a single *OPC? sync. Falls back to one write per command if the instrument does not support
+        compound messages.
+        args:
+            commands (list): SCPI command strings, in the order they should be executed
+        """
+        if self.supports_compound_commands and not getattr(self, 'virtual', False):
+            self.instrument.write(compound_command(commands))
+            self.instrument.query("*OPC?")
+        else:
+            for command in commands:
+                self.instrument.write(command)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Context manager that collects every write made by driver methods inside the block and sends
+        them as one batch_write when the block ends, e.g.
+            with osc.batch():
+                osc.set_trigger_source('EXT')
+                osc.set_trigger_level(0.95)
+        Queries inside the block flush the writes made so far first. No-op for instruments without
+        compound support, virtual instruments and nested batches.
+        """
+        if not self.supports_compound_commands or getattr(self, 'virtual', False) or isinstance(self.instrument, _BatchedWrites):
+            yield
+            return
+        batched = _BatchedWrites(self.instrument)
+        self.instrument = batched
+        try:
+            yield
+        finally:
+            self.instrument = batched._instrument
+            batched.flush()
+
     #Utility Commands
     def initialize(self):
         """
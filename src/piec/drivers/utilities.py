@@ -17,15 +17,24 @@ import importlib
 from pathlib import Path
 import json
 import os
+import threading
 
 class PiecManager():
     """
     Basically Resource Manager that melds MCC digilent stuff into it.
     Allows for getting all resources from both VISA and MCC.
+    All PiecManagers share one pyvisa ResourceManager so the VISA library is only loaded once per process.
     """
+    _shared_rm = None
+    _shared_rm_lock = threading.Lock() # GUI scans and measurement workers can create the first PiecManager concurrently
+
     def __init__(self):
-        """Initializes the underlying pyvisa ResourceManager."""
-        self.rm = ResourceManager()
+        """Initializes (or reuses) the underlying pyvisa ResourceManager."""
+        if PiecManager._shared_rm is None:
+            with PiecManager._shared_rm_lock:
+                if PiecManager._shared_rm is None:
+                    PiecManager._shared_rm = ResourceManager()
+        self.rm = PiecManager._shared_rm
 
     def list_resources(self):
         """
@@ -1,9 +1,14 @@
 """
 This is the top level instrument that dictates if something is scpi, dac, arduino, etc.
 """
-from pyvisa import ResourceManager
+from piec.drivers.utilities import PiecManager
 #ovverride resource manager with digilient
 #good
+
+def _resource_manager():
+    """Legacy Instruments share PiecManager's ResourceManager, which is created once under a lock"""
+    return PiecManager().rm
+
 class Instrument:
     # Initializer / Instance attributes
     """
@@ -11,8 +16,7 @@ class Instrument:
     Since a hypothetical instrument could have no idn commands or etc
     """
     def __init__(self, address):
-        rm = ResourceManager()
-        self.instrument = rm.open_resource(address)
+        self.instrument = _resource_manager().open_resource(address)
 
     def idn(self):
         """
@@ -1,5 +1,7 @@
 import numpy as np
 import time
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import matplotlib.pyplot as plt
 from piec.analysis.utilities import *
@@ -91,8 +93,9 @@ class DiscreteWaveform:
         Should be called before any waveform-specific configuration.
         """
         self.awg.initialize()
-        self.awg.set_load_impedance(channel=int(self.voltage_channel), load_impedance=50)
-        self.awg.set_trigger_source(channel=int(self.voltage_channel), trigger_source='MAN')
+        with self._batched(self.awg):
+            self.awg.set_load_impedance(channel=int(self.voltage_channel), load_impedance=50)
+            self.awg.set_trigger_source(channel=int(self.voltage_channel), trigger_source='MAN')
 
     def configure_oscilloscope(self, channel = 1):
         """
@@ -105,14 +108,24 @@ class DiscreteWaveform:
             :channel: Oscilloscope channel to configure (default 1)
         """
         self.osc.initialize()
-        self.osc.configure_horizontal(tdiv=self.length/8, x_position=5*(self.length/10))
-        self.osc.set_vertical_scale(channel=channel, vdiv=float(self.v_div))
-        self.osc.set_trigger_source(trigger_source='EXT')
-        self.osc.set_trigger_level(trigger_level=0.95) # Using the old high_level value
-        self.osc.set_trigger_sweep(trigger_sweep='NORM')
-        self.osc.set_channel_impedance(channel, channel_impedance='50')
+        with self._batched(self.osc):
+            self.osc.configure_horizontal(tdiv=self.length/8, x_position=5*(self.length/10))
+            self.osc.set_vertical_scale(channel=channel, vdiv=float(self.v_div))
+            self.osc.set_trigger_source(trigger_source='EXT')
+            self.osc.set_trigger_level(trigger_level=0.95) # Using the old high_level value
+            self.osc.set_trigger_sweep(trigger_sweep='NORM')
+            self.osc.set_channel_impedance(channel, channel_impedance='50')
         # configure_trigger_edge call removed as functionality is now in the calls above.
 
+    @staticmethod
+    def _batched(instrument):
+        """
+        Returns instrument.batch() so a block of setter calls is sent as one compound SCPI write,
+        or a no-op context for drivers without batching.
+        """
+        batch = getattr(instrument, 'batch', None)
+        return batch() if batch is not None else contextlib.ExitStack()
+
     def configure_awg(self):
         """
         Placeholder for waveform-specific AWG configuration.
@@ -134,9 +147,13 @@ class DiscreteWaveform:
         self.awg.output(channel=int(self.voltage_channel), on=True)
         self.awg.output_trigger()
         
-        # New driver lacks a blocking operation complete query.
-        # Wait for a duration slightly longer than the waveform to ensure capture.
-        time.sleep(self.length * 1.2)
+        if hasattr(self.osc, 'wait_complete'):
+            # Scope can block until the acquisition is done, one round-trip instead of a fixed sleep
+            self.osc.wait_complete(timeout=self.length * 1.2 + 1)
+        else:
+            # Driver lacks a blocking operation complete query.
+            # Wait for a duration slightly longer than the waveform to ensure capture.
+            time.sleep(self.length * 1.2)
         
         self.osc.set_acquisition_channel(channel=1) # Setup waveform source
         
@@ -188,16 +205,34 @@ class DiscreteWaveform:
         7. Update history with metadata
         """
         print(f"Running experiment for {self.mtype} measurement...")
-        self.configure_oscilloscope()
+        self.acquire()
+        self.process()
+
+    def acquire(self):
+        """
+        Instrument half of run_experiment (steps 1-5). Only talks to the instruments
+        and the filesystem, so GUIs can run it on a worker thread.
+        """
+        # The scope and AWG are independent sessions, so the scope setup runs alongside the
+        # AWG setup (dominated by the arb waveform upload) instead of before it
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            osc_configured = pool.submit(self.configure_oscilloscope)
+            self.initialize_awg()
+            print("AWG initialized.")
+            self.configure_awg()
+            print("AWG configured.")
+            osc_configured.result()
         print("Oscilloscope configured.")
-        self.initialize_awg()
-        print("AWG initialized.")
-        self.configure_awg()
-        print("AWG configured.")
         self.apply_and_capture_waveform()
         print("Waveform applied and captured.")
         self.save_waveform()
         print("Waveform saved.")
+
+    def process(self):
+        """
+        Analysis half of run_experiment (steps 6-7). With show_plots off and a non-interactive
+        pyplot backend (e.g. Agg) GUIs can run it on the worker thread right after acquire.
+        """
         self.analyze()
         print("Analysis complete.")
         self._update_history()
@@ -266,7 +301,8 @@ class HysteresisLoop(DiscreteWaveform):
         and generates hysteresis loop plots. Results appended to CSV.
         """
         if self.data is not None:
-            process_raw_hyst(self.filename, show_plots=self.show_plots, save_plots=self.save_plots, auto_timeshift=self.auto_timeshift)
+            # keep what was written to the file so callers can use it without reading it back
+            self.metadata, self.data = process_raw_hyst(self.filename, show_plots=self.show_plots, save_plots=self.save_plots, auto_timeshift=self.auto_timeshift)
             print(f"Analysis succeeded, updated {self.filename}")
         else:
             print("No data to analyze. Capture the waveform first.")
@@ -277,7 +313,10 @@ class HysteresisLoop(DiscreteWaveform):
         
         Creates multi-cycle bipolar triangle wave with specified parameters.
         """
-        interp_v_array = [0,1,0,-1,0]+([1,0,-1,0]*((self.n_cycles)-1))
+        # 0 followed by n_cycles of (1, 0, -1, 0), filled directly instead of through a python list
+        interp_v_array = np.empty(4*int(self.n_cycles)+1)
+        interp_v_array[0] = 0.0
+        interp_v_array[1:] = np.tile([1.0, 0.0, -1.0, 0.0], int(self.n_cycles))
 
         n_points = self.awg.arb_data_range[1] # Use attribute for max points
         dense = interpolate_sparse_to_dense(np.linspace(0,len(interp_v_array),len(interp_v_array)), interp_v_array, total_points=n_points)
@@ -289,12 +328,13 @@ class HysteresisLoop(DiscreteWaveform):
         invert = self.amplitude < 0
         polarity = "INV" if invert else "NORM"
         
-        self.awg.set_arb_waveform(channel=int(self.voltage_channel), name="VOLATILE")
-        # Vpp = amplitude*2
-        self.awg.set_amplitude(channel=int(self.voltage_channel), amplitude=abs(self.amplitude) * 2)
-        self.awg.set_offset(channel=int(self.voltage_channel), offset=self.offset)
-        self.awg.set_frequency(channel=int(self.voltage_channel), frequency=self.frequency)
-        self.awg.set_polarity(channel=int(self.voltage_channel), polarity=polarity)
+        with self._batched(self.awg):
+            self.awg.set_arb_waveform(channel=int(self.voltage_channel), name="VOLATILE")
+            # Vpp = amplitude*2
+            self.awg.set_amplitude(channel=int(self.voltage_channel), amplitude=abs(self.amplitude) * 2)
+            self.awg.set_offset(channel=int(self.voltage_channel), offset=self.offset)
+            self.awg.set_frequency(channel=int(self.voltage_channel), frequency=self.frequency)
+            self.awg.set_polarity(channel=int(self.voltage_channel), polarity=polarity)
 
 class ThreePulsePund(DiscreteWaveform):
     """
@@ -362,7 +402,8 @@ class ThreePulsePund(DiscreteWaveform):
         switched charge values. Generates time-domain and polarization plots.
         """
         if self.data is not None:
-            process_raw_3pp(self.filename, show_plots=self.show_plots, save_plots=self.save_plots, auto_timeshift=self.auto_timeshift)
+            # keep what was written to the file so callers can use it without reading it back
+            self.metadata, self.data = process_raw_3pp(self.filename, show_plots=self.show_plots, save_plots=self.save_plots, auto_timeshift=self.auto_timeshift)
             print(f"Analysis succeeded, updated {self.filename}")
         else:
             print("No data to analyze. Capture the waveform first.")
@@ -402,8 +443,9 @@ class ThreePulsePund(DiscreteWaveform):
         self.awg.create_arb_waveform(channel=int(self.voltage_channel), name="VOLATILE", data=dense_v)
         
         # Configure the AWG output using the specific methods
-        self.awg.set_arb_waveform(channel=int(self.voltage_channel), name="VOLATILE")
-        self.awg.set_offset(channel=int(self.voltage_channel), offset=self.offset)
-        self.awg.set_amplitude(channel=int(self.voltage_channel), amplitude=abs(amplitude))
-        self.awg.set_frequency(channel=int(self.voltage_channel), frequency=1/self.length)
+        with self._batched(self.awg):
+            self.awg.set_arb_waveform(channel=int(self.voltage_channel), name="VOLATILE")
+            self.awg.set_offset(channel=int(self.voltage_channel), offset=self.offset)
+            self.awg.set_amplitude(channel=int(self.voltage_channel), amplitude=abs(amplitude))
+            self.awg.set_frequency(channel=int(self.voltage_channel), frequency=1/self.length)
         print("AWG configured for a PUND pulse.")
\ No newline at end of file
@@ -1,12 +1,22 @@
 import sys
 import os
+import re
+import ast
+import operator
+import functools
+import time
+import types
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog
+import numpy as np
 import matplotlib
 matplotlib.use('TkAgg')
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 plot_layout_params = {
             "font.size": 15,
@@ -25,15 +35,129 @@ plot_layout_params = {
             "xtick.minor.size": 3,
             "ytick.minor.size": 3,
             "figure.autolayout": True, # Decrease white margins
-            "figure.figsize": (6, 4) # Slightly taller default
+            "figure.figsize": (6, 4), # Slightly taller default
+            "path.simplify": True, # Merge nearly collinear segments of long traces before stroking
+            "path.simplify_threshold": 1.0,
+            "agg.path.chunksize": 10000 # Stroke long paths in chunks, avoids AGG slowdowns and overflows
         }
 
+# A non-threaded Tcl makes tkinter poll for events, sleeping this many ms between polls (CPython default 20).
+# A shorter sleep keeps worker results and queued renders from waiting on the poll
+TK_BUSYWAIT_MS = 5
+try:
+    import _tkinter
+    _tkinter.setbusywaitinterval(TK_BUSYWAIT_MS)
+except (ImportError, AttributeError):
+    pass
+
+# VISA enumeration is slow over TCPIP/GPIB, the last listing is reused for this many seconds (see get_visa_resources)
+VISA_CACHE_TTL = 30.0
+_visa_cache = {"ts": 0.0, "resources": None}
+
+# Patterns accepting every prefix of a valid number, so entries can be validated per keystroke
+NUMBER_PATTERNS = {
+    float: re.compile(r"[+-]?(\d+\.?\d*([eE][+-]?\d*)?|\.(\d+([eE][+-]?\d*)?)?)?"),
+    int: re.compile(r"[+-]?\d*"),
+}
+
+# Color Palette - Layered
+bg_root = "#181818"       # Darkest (Background)
+bg_sidebar = "#202020"    # Left Panel
+bg_card = "#2B2B2B"       # Content Cards
+bg_field = "#383838"      # Input Fields
+fg_text = "#E0E0E0"       # Off-white text
+border_grey = "#3E3E42"   # Subtle border
+
+# Dark theme derived from 'clam', compiled once into a single ttk theme_create call (see setup_styles)
+THEME_NAME = "piec_dark"
+THEME_SETTINGS = {
+    # General defaults
+    ".": {"configure": {"background": bg_root,
+                        "foreground": fg_text,
+                        "font": ("Helvetica", 15)}},
+    # TFrame (Default for transparent-ish look on root)
+    "TFrame": {"configure": {"background": bg_root,
+                             "borderwidth": 0}}, # No border for layout frames
+    # SideBar Style
+    "SideBar.TFrame": {"configure": {"background": bg_sidebar,
+                                     "relief": "flat"}},
+    # Card Style for LabelFrames
+    "Card.TLabelframe": {"configure": {"background": bg_card,
+                                       "borderwidth": 0,
+                                       "relief": "flat"}},
+    "Card.TFrame": {"configure": {"background": bg_card,
+                                  "borderwidth": 0,
+                                  "relief": "flat"}},
+    "Card.TLabelframe.Label": {"configure": {"background": bg_card,
+                                             "foreground": fg_text,
+                                             "font": ("Helvetica", 20, "bold")}}, # Adjusted font size
+    # TLabel - 'clam' paints label backgrounds, so default to the most common parent (Card)
+    "TLabel": {"configure": {"background": bg_card,
+                             "foreground": fg_text,
+                             "font": ("Helvetica", 12)}},
+    "TButton": {"configure": {"padding": 6,
+                              "relief": "flat",
+                              "background": bg_field,
+                              "foreground": fg_text,
+                              "borderwidth": 0,
+                              "font": ("Helvetica", 15, "bold")},
+                "map": {"background": [('active', '#4A4A4A'), ('pressed', '#555555')],
+                        "foreground": [('active', '#FFFFFF')]}},
+    "TEntry": {"configure": {"fieldbackground": bg_field,
+                             "foreground": fg_text,
+                             "insertcolor": fg_text,
+                             "borderwidth": 0,
+                             "relief": "flat",
+                             "lightcolor": bg_field,
+                             "darkcolor": bg_field,
+                             "bordercolor": bg_field}},
+    # numeric_entry text that does not convert yet
+    "Invalid.TEntry": {"configure": {"fieldbackground": "#4A2B2B",
+                                     "borderwidth": 1,
+                                     "lightcolor": "#E05252",
+                                     "darkcolor": "#E05252",
+                                     "bordercolor": "#E05252"}},
+    "TCombobox": {"configure": {"fieldbackground": bg_field,
+                                "background": bg_field,
+                                "foreground": fg_text,
+                                "arrowcolor": fg_text,
+                                "borderwidth": 0,
+                                "relief": "flat",
+                                "lightcolor": bg_field,
+                                "darkcolor": bg_field,
+                                "bordercolor": bg_field},
+                  "map": {"fieldbackground": [('readonly', bg_field)],
+                          "selectbackground": [('readonly', bg_field)],
+                          "selectforeground": [('readonly', fg_text)]}},
+    "TCheckbutton": {"configure": {"background": bg_card, # Assuming inside cards
+                                   "foreground": fg_text,
+                                   "font": ("Helvetica", 10),
+                                   "indicatorcolor": bg_field,
+                                   "indicatorrelief": "solid",
+                                   "indicatorborderwidth": 1},
+                     "map": {"indicatorcolor": [('selected', fg_text), ('active', '#4A4A4A')],
+                             "background": [('active', bg_card)]}},
+    "Vertical.TScrollbar": {"configure": {"gripcount": 0,
+                                          "background": bg_field,
+                                          "darkcolor": bg_field,
+                                          "lightcolor": bg_field,
+                                          "troughcolor": bg_card,
+                                          "bordercolor": bg_card,
+                                          "arrowcolor": fg_text,
+                                          "relief": "flat"},
+                            "map": {"background": [('active', '#4A4A4A'), ('pressed', '#555555')]}},
+}
+
 class ConsoleRedirector:
     def __init__(self, text_widget, tag="stdout"):
         self.text_widget = text_widget
         self.tag = tag
+        self.pending = queue.Queue() # text printed from worker threads, flushed on the Tk thread
 
     def write(self, string):
+        if threading.current_thread() is not threading.main_thread():
+            self.pending.put(string)
+            return
         try:
             self.text_widget.configure(state='normal')
             self.text_widget.insert(tk.END, string, (self.tag,))
@@ -46,10 +170,27 @@ class ConsoleRedirector:
     def flush(self):
         pass
 
+    def flush_pending(self):
+        """Writes any text queued by worker threads, must be called from the Tk thread"""
+        while True:
+            try:
+                string = self.pending.get_nowait()
+            except queue.Empty:
+                return
+            self.write(string)
+
 class MeasurementApp:
+    plot_interval = 33 # ms between live plot renders (~30 Hz)
+    antialias_limit = 2000 # traces with more drawn points than this are rendered without antialiasing
+
     def __init__(self, root, title="Measurement GUI", geometry="1200x700", icon_path=None):
         self.root = root
         self.root.title(title)
+        self._number_vcmds = {} # converter -> registered Tk validatecommand, see numeric_entry
+        self._numeric_entries = [] # every numeric_entry, checked by start_measurement
+        self._addr_values = ("VIRTUAL",) # shared values of every instrument address combobox, see set_address_lists
+        self._measurement_cache = None # ((filename, mtime, size), metadata, {column: array}), see load_measurement
+        self.experiment = None # set by run_measurement, until then plot_data has nothing to show
         self.root.geometry(geometry)
         
         # icon import
@@ -79,7 +220,7 @@ class MeasurementApp:
         
         # Keyboard Shortcuts
         self.keyboard_shortcuts = {
-            "<Control-Return>": lambda event: self.run_measurement()
+            "<Control-Return>": lambda event: self.start_measurement()
         }
         self.setup_shortcuts()
         
@@ -100,6 +241,14 @@ class MeasurementApp:
         sys.stdout = self.console
         sys.stderr = self.console # Optional: redirect stderr too, maybe with different tag if extended
 
+        # Worker for blocking measurements, results come back through a queue polled by the Tk loop
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._scan_pool = ThreadPoolExecutor(max_workers=1) # VISA enumeration, kept off the measurement worker
+        self._results = queue.Queue()
+        self._drain_id = self.root.after(50, self._drain)
+        self._debounced = {} # key -> pending after() id, see debounce
+        self._instruments = {} # role -> ((driver class, address, options), driver), see open_instrument
+
         # Load settings after a short delay to ensure widgets are ready
         self._load_settings_id = self.root.after(200, self.load_settings)
 
@@ -153,7 +302,7 @@ class MeasurementApp:
         
         # 2. Run Button
         # Subclasses must implement run_measurement
-        self.run_button = ttk.Button(self.right_panel, text="RUN MEASUREMENT", command=self.run_measurement, style="TButton")
+        self.run_button = ttk.Button(self.right_panel, text="RUN MEASUREMENT", command=self.start_measurement, style="TButton")
         self.run_button.grid(row=1, column=0, pady=10)
 
         # 3. Log Console
@@ -169,6 +318,184 @@ class MeasurementApp:
     def run_measurement(self):
         print("WARNING: run_measurement not implemented in subclass")
 
+    def start_measurement(self):
+        """
+        Run button and Ctrl+Enter. Ignored while a measurement is running, and refused while any shown
+        numeric_entry holds text that does not convert, so run_measurement never fails halfway through reading inputs
+        """
+        if self.run_button.instate(['disabled']):
+            print("Measurement already in progress...")
+            return
+        invalid = [entry for entry in self._numeric_entries if entry.winfo_manager() and not entry.valid()]
+        if invalid:
+            print(f"Fix the {len(invalid)} highlighted input(s) before running.")
+            invalid[0].focus_set()
+            return
+        self.run_measurement()
+
+    def run_in_background(self, func, on_done=None, on_error=None):
+        """
+        Runs func on the worker thread so the Tk event loop keeps running during instrument I/O.
+        on_done(result) or on_error(exception) is called back on the Tk thread; the worker must never touch widgets or artists.
+        """
+        self.run_button.state(['disabled'])
+
+        def release(callback):
+            def wrapped(value):
+                self.run_button.state(['!disabled'])
+                if callback is not None:
+                    callback(value)
+            return wrapped
+        return self._submit(self._pool, func, release(on_done), release(on_error))
+
+    def set_address_lists(self, comboboxes, visa_resources):
+        """
+        Gives every address combobox the same ("VIRTUAL", *visa_resources) tuple, built once per scan.
+        The comboboxes are built with self._addr_values, so a rescan that finds the same resources touches no widget.
+        Current selections are kept, configuring values does not change the shown text
+        """
+        values = ("VIRTUAL",) + tuple(visa_resources)
+        if values == self._addr_values:
+            return
+        self._addr_values = values
+        for combobox in comboboxes:
+            combobox.configure(values=self._addr_values)
+
+    def scan_visa_resources(self, on_done, force=False):
+        """
+        Enumerates VISA resources on a background thread so a slow bus scan never blocks the window.
+        on_done(resources) is called back on the Tk thread with the list from get_visa_resources
+        """
+        return self._submit(self._scan_pool, lambda: self.get_visa_resources(force=force), on_done)
+
+    def _submit(self, pool, func, on_done=None, on_error=None):
+        """Submits func to pool and queues its future for _drain to dispatch on the Tk thread"""
+        future = pool.submit(func)
+        future.add_done_callback(lambda f: self._results.put((f, on_done, on_error)))
+        return future
+
+    def open_instrument(self, role, driver_class, address, **kwargs):
+        """
+        Returns a connected driver_class(address, **kwargs) for role ("awg", "osc", ...), reusing the session from the
+        previous run when the driver, address and kwargs are unchanged. A replaced session is closed first
+        """
+        key = (driver_class, address, tuple(sorted(kwargs.items())))
+        cached = self._instruments.get(role)
+        if cached is not None:
+            if cached[0] == key:
+                return cached[1]
+            self.close_instrument(role)
+        instrument = driver_class(address, **kwargs)
+        self._instruments[role] = (key, instrument)
+        return instrument
+
+    def close_instrument(self, role):
+        """Closes and forgets the cached session for role, if any"""
+        from piec.drivers.autodetect import _safe_close
+        cached = self._instruments.pop(role, None)
+        if cached is not None:
+            _safe_close(cached[1])
+
+    def load_measurement(self, filename, columns):
+        """
+        Returns (metadata, data) for a saved measurement, metadata is a plain dict and data maps each of columns to a float array.
+        Only the requested columns are parsed and they are kept until the file changes,
+        so switching back to an already plotted axis does not touch the disk
+        """
+        from piec.analysis.utilities import standard_csv_metadata, standard_csv_columns # pulls in pandas, only needed once data exists
+        stat = os.stat(filename)
+        key = (filename, stat.st_mtime_ns, stat.st_size)
+        if self._measurement_cache is None or self._measurement_cache[0] != key:
+            self._measurement_cache = (key, standard_csv_metadata(filename), {})
+        _, metadata, data = self._measurement_cache
+        missing = [col for col in columns if col not in data]
+        if missing:
+            data.update(standard_csv_columns(filename, missing))
+        return metadata, data
+
+    def cache_measurement(self, filename, metadata, data):
+        """
+        Seeds the load_measurement cache with the DataFrames an experiment just wrote to filename,
+        so the plot right after a run does not parse the CSV it came from
+        """
+        stat = os.stat(filename)
+        key = (filename, stat.st_mtime_ns, stat.st_size)
+        numeric = data.select_dtypes(include='number')
+        columns = {col: numeric[col].to_numpy(dtype=np.float64) for col in numeric.columns}
+        self._measurement_cache = (key, metadata.iloc[0].to_dict(), columns)
+
+    def numeric_entry(self, parent, convert=float, **kwargs):
+        """
+        Creates a ttk.Entry that rejects keystrokes which cannot form a number of type convert (float, int or evaluate_number).
+        Text that does not convert yet (e.g. '1e' or an unclosed expression) is kept but drawn with Invalid.TEntry
+        until it does. The converter is bound to the widget at creation, so callers read the typed value with entry.value()
+        """
+        if convert not in self._number_vcmds:
+            pattern = NUMBER_PATTERNS.get(convert) # expressions have no per-keystroke pattern, they are only flagged
+
+            def validate(text, widget):
+                if pattern is not None and pattern.fullmatch(text) is None:
+                    return False
+                self.root.nametowidget(widget).configure(style="TEntry" if converts(text, convert) else "Invalid.TEntry")
+                return True
+            self._number_vcmds[convert] = (self.root.register(validate), '%P', '%W')
+        entry = ttk.Entry(parent, validate='key', validatecommand=self._number_vcmds[convert], **kwargs)
+        entry.value = lambda: convert(entry.get())
+        entry.valid = lambda: converts(entry.get(), convert)
+        self._numeric_entries.append(entry)
+        return entry
+
+    def build_numeric_inputs(self, parent, fields, defaults, width=20):
+        """
+        Builds a Label/numeric_entry row per (key, label, converter) in fields and fills in defaults[key].
+        Returns the entries keyed like fields, ready to be used as self.dynamic_inputs
+        """
+        entries = {}
+        for row, (key, label, convert) in enumerate(fields):
+            ttk.Label(parent, text=label).grid(row=row, column=0, sticky="w")
+            entry = self.numeric_entry(parent, convert=convert, width=width)
+            entry.grid(row=row, column=1, padx=5, pady=5)
+            entry.insert(0, defaults[key])
+            entries[key] = entry
+        return entries
+
+    def visible_children(self, frame):
+        """Children of frame that are currently gridded/packed, rows hidden with grid_forget are skipped"""
+        return [widget for widget in frame.winfo_children() if widget.winfo_manager()]
+
+    def debounce(self, key, callback, delay=50):
+        """Schedules callback after delay ms, cancelling any call still pending under the same key"""
+        pending = self._debounced.get(key)
+        if pending is not None:
+            self.root.after_cancel(pending)
+
+        def fire():
+            self._debounced.pop(key, None)
+            callback()
+        self._debounced[key] = self.root.after(delay, fire)
+
+    def schedule_replot(self, event=None):
+        """Axis selector callback, coalesces quick successive changes into a single plot_data call"""
+        self.debounce("replot", self.plot_data, delay=75)
+
+    def _drain(self):
+        """Polls for finished background jobs and worker console output from the Tk thread"""
+        try:
+            self.console.flush_pending()
+            while True:
+                try:
+                    future, on_done, on_error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                if future.exception() is not None:
+                    print(f"ERROR: {future.exception()}")
+                    if on_error is not None:
+                        on_error(future.exception())
+                elif on_done is not None:
+                    on_done(future.result())
+        finally:
+            self._drain_id = self.root.after(50, self._drain)
+
     def setup_log_console(self, parent):
         self.log_frame = ttk.Frame(parent, style="Card.TFrame")
         self.log_frame.grid(row=2, column=0, sticky="nsew", pady=(0, 0))
@@ -192,158 +519,142 @@ class MeasurementApp:
             current_dir = os.path.dirname(os.path.abspath(__file__))
             style_path = os.path.join(current_dir, '..', '..', 'natty_style.mplstyle')
             if os.path.exists(style_path):
-                plt.style.use(style_path)
+                matplotlib.style.use(style_path)
             else:
                  style_path = os.path.join(current_dir, '..', 'natty_style.mplstyle')
                  if os.path.exists(style_path):
-                     plt.style.use(style_path)
+                     matplotlib.style.use(style_path)
                  else:
                      print(f"WARNING: natty_style.mplstyle not found at {style_path}")
         except Exception as e:
             print(f"WARNING: Failed to load natty_style: {e}")
 
         # Override style for GUI visibility (Scale up for screen)
-        plt.rcParams.update(plot_layout_params)
+        matplotlib.rcParams.update(plot_layout_params)
 
         # Plotting section - Using Card style
         self.plot_frame = ttk.LabelFrame(parent, text="ACQUIRED DATA", padding=5, style="Card.TLabelframe")
         self.plot_frame.grid(row=0, column=0, sticky="nsew") 
         
-        self.fig, self.ax = plt.subplots() 
+        # Figure is used directly (not pyplot) so no second event loop competes with Tk
+        self.fig = Figure()
+        self.ax = self.fig.add_subplot(111)
+        self.line, = self.ax.plot([], [], marker='.', color='k', animated=True) # persistent trace, blitted by update_plot
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
+        self._bg = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.mpl_connect('resize_event', self._on_resize)
+        self._plot_dirty = False # a render is scheduled, see update_plot
+        self._latest_plot = None
+        self._decimated = None # (x source, y source, pixel width, (x, y)), see _decimate
+        self.canvas.get_tk_widget().configure(highlightthickness=0)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # Tk fires many <Configure> events while the window is built, each one re-rendering the figure.
+        # Ignore them until the layout has settled, then resize once to the final size
+        self.canvas.get_tk_widget().unbind("<Configure>")
+        self.root.after(500, self._enable_resize)
 
         self.toolbar = NavigationToolbar2Tk(self.canvas, self.plot_frame)
         self.toolbar.update()
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
 
+    def _enable_resize(self):
+        """Reconnects the canvas resize handler that setup_plot deferred and fits the figure to the settled canvas"""
+        widget = self.canvas.get_tk_widget()
+        widget.bind("<Configure>", self.canvas.resize)
+        self.canvas.resize(types.SimpleNamespace(width=widget.winfo_width(), height=widget.winfo_height()))
+
+    def _on_draw(self, event):
+        """Re-caches the static axes background after every full draw and paints the animated trace on top"""
+        if event.renderer is self.canvas.get_renderer():
+            self._bg = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.line.draw(event.renderer)
+
+    def _on_resize(self, event):
+        """The cached background no longer matches the axes size, force the next render to redraw fully"""
+        self._bg = None
+
+    def update_plot(self, x_data, y_data, xlabel=None, ylabel=None):
+        """
+        Queues new data for the persistent trace. Renders are capped at ~30 Hz (plot_interval ms),
+        calls arriving before the next frame only replace the pending data so they collapse into one draw.
+        x_data and y_data may be ndarrays or pandas Series.
+        Requests for the same arrays and labels as the last one (e.g. re-selecting the shown axis) are dropped
+        """
+        if xlabel is not None and xlabel == ylabel:
+            print(f"X and Y are both '{xlabel}', pick a different column to plot.")
+            return
+        latest = self._latest_plot
+        if latest is not None and latest[0] is x_data and latest[1] is y_data and latest[2:] == (xlabel, ylabel):
+            return
+        self._latest_plot = (x_data, y_data, xlabel, ylabel)
+        if not self._plot_dirty:
+            self._plot_dirty = True
+            self.root.after(self.plot_interval, self._render_plot)
+
+    def _render_plot(self):
+        """
+        Draws the latest queued data. When the labels and autoscaled limits are unchanged only the
+        trace is blitted over the cached background, otherwise a full redraw is scheduled with draw_idle
+        """
+        self._plot_dirty = False
+        x_data, y_data, xlabel, ylabel = self._latest_plot
+        x_data, y_data = np.asarray(x_data, dtype=np.float64), np.asarray(y_data, dtype=np.float64)
+        x_data, y_data = self._decimate(x_data, y_data)
+        self.line.set_data(x_data, y_data)
+        self.line.set_antialiased(len(y_data) <= self.antialias_limit)
+        axes_changed = self._bg is None
+        if xlabel is not None and xlabel != self.ax.get_xlabel():
+            self.ax.set_xlabel(xlabel)
+            axes_changed = True
+        if ylabel is not None and ylabel != self.ax.get_ylabel():
+            self.ax.set_ylabel(ylabel)
+            axes_changed = True
+        old_limits = (self.ax.get_xlim(), self.ax.get_ylim())
+        self.ax.relim()
+        self.ax.autoscale_view()
+        if axes_changed or old_limits != (self.ax.get_xlim(), self.ax.get_ylim()):
+            self.canvas.draw_idle() # _on_draw re-caches the background once the redraw happens
+            return
+        self.canvas.restore_region(self._bg)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+    def _decimate(self, x_data, y_data):
+        """
+        Min/max decimates traces with more samples than the axes has pixels. The result is kept for the
+        last (x, y, pixel width) so re-rendering the same cached columns skips the reduction
+        """
+        width = int(self.ax.bbox.width)
+        if width < 100: # axes has no real size until the canvas is mapped
+            width = 800
+        if len(y_data) <= 4 * width: # few enough samples to draw them all
+            return x_data, y_data
+        cached = self._decimated
+        if cached is not None and cached[0] is x_data and cached[1] is y_data and cached[2] == width:
+            return cached[3]
+        decimated = minmax_decimate(x_data, y_data, width)
+        self._decimated = (x_data, y_data, width, decimated)
+        return decimated
+
     def setup_styles(self):
+        """Applies the dark theme, THEME_SETTINGS is sent to Tk as one script the first time it is created"""
         self.style = ttk.Style()
-        self.style.theme_use('clam')
-
-        # Color Palette - Layered
-        bg_root = "#181818"       # Darkest (Background)
-        bg_sidebar = "#202020"    # Left Panel
-        bg_card = "#2B2B2B"       # Content Cards
-        bg_field = "#383838"      # Input Fields
-        fg_text = "#E0E0E0"       # Off-white text
-        border_grey = "#3E3E42"   # Subtle border
-        
-        # General defaults
-        self.style.configure(".", 
-                             background=bg_root, 
-                             foreground=fg_text, 
-                             font=("Helvetica", 15))
-
-        # TFrame (Default for transparent-ish look on root)
-        self.style.configure("TFrame", 
-                             background=bg_root,
-                             borderwidth=0) # No border for layout frames
-                             
-        # SideBar Style
-        self.style.configure("SideBar.TFrame",
-                             background=bg_sidebar,
-                             relief="flat")
-
-        # Card Style for LabelFrames
-        self.style.configure("Card.TLabelframe", 
-                             background=bg_card,
-                             borderwidth=0, 
-                             relief="flat")
-        
-        self.style.configure("Card.TFrame", 
-                             background=bg_card,
-                             borderwidth=0, 
-                             relief="flat")
-        
-        self.style.configure("Card.TLabelframe.Label",
-                             background=bg_card,
-                             foreground=fg_text,
-                             font=("Helvetica", 20, "bold")) # Adjusted font size
-
-        # TLabel - Need to handle different backgrounds...
-        # Since we can't easily have transparent labels in ttk clam with different bg colors,
-        # We might need specific styles or default to the most common one (Card).
-        # Or we rely on the widget picking up the parent style if we don't set background explicitely?
-        # 'clam' theme usually paints background.
-        self.style.configure("TLabel", 
-                             background=bg_card, 
-                             foreground=fg_text,
-                             font=("Helvetica", 12))
-        
-        # TButton
-        self.style.configure("TButton", 
-                             padding=6, 
-                             relief="flat", 
-                             background=bg_field, 
-                             foreground=fg_text,
-                             borderwidth=0,
-                             font=("Helvetica", 15, "bold"))
-        
-        self.style.map("TButton", 
-                       background=[('active', '#4A4A4A'), ('pressed', '#555555')],
-                       foreground=[('active', '#FFFFFF')])
-
-        # TEntry
-        self.style.configure("TEntry", 
-                             fieldbackground=bg_field,
-                             foreground=fg_text,
-                             insertcolor=fg_text,
-                             borderwidth=0,
-                             relief="flat",
-                             lightcolor=bg_field,
-                             darkcolor=bg_field,
-                             bordercolor=bg_field)
-                             
-        # TCombobox
-        self.style.configure("TCombobox", 
-                             fieldbackground=bg_field,
-                             background=bg_field,
-                             foreground=fg_text,
-                             arrowcolor=fg_text,
-                             borderwidth=0,
-                             relief="flat",
-                             lightcolor=bg_field,
-                             darkcolor=bg_field,
-                             bordercolor=bg_field)
-        
-        self.style.map("TCombobox", 
-                       fieldbackground=[('readonly', bg_field)],
-                       selectbackground=[('readonly', bg_field)],
-                       selectforeground=[('readonly', fg_text)])
-
-        # TCheckbutton
-        self.style.configure("TCheckbutton", 
-                             background=bg_card, # Assuming inside cards
-                             foreground=fg_text,
-                             font=("Helvetica", 10),
-                             indicatorcolor=bg_field,
-                             indicatorrelief="solid",
-                             indicatorborderwidth=1)
-
-        self.style.map("TCheckbutton",
-                       indicatorcolor=[('selected', fg_text), ('active', '#4A4A4A')],
-                       background=[('active', bg_card)])
-
-        # TScrollbar
-        self.style.configure("Vertical.TScrollbar",
-                             gripcount=0,
-                             background=bg_field,
-                             darkcolor=bg_field,
-                             lightcolor=bg_field,
-                             troughcolor=bg_card,
-                             bordercolor=bg_card,
-                             arrowcolor=fg_text,
-                             relief="flat")
-                             
-        self.style.map("Vertical.TScrollbar",
-                       background=[('active', '#4A4A4A'), ('pressed', '#555555')])
+        if THEME_NAME not in self.style.theme_names():
+            self.style.theme_create(THEME_NAME, parent='clam', settings=THEME_SETTINGS)
+        self.style.theme_use(THEME_NAME)
 
     def on_closing(self):
         # Cancel pending load_settings if any
         if hasattr(self, '_load_settings_id'):
             self.root.after_cancel(self._load_settings_id)
+        if hasattr(self, '_drain_id'):
+            self.root.after_cancel(self._drain_id)
+        self._pool.shutdown(wait=False)
+        self._scan_pool.shutdown(wait=False)
+        for role in list(self._instruments):
+            self.close_instrument(role)
 
         # Prompt to save settings
         if tk.messagebox.askyesno("Save Settings", "Do you want to save the current GUI settings?"):
@@ -364,6 +675,41 @@ class MeasurementApp:
         except Exception:
             return None
 
+    def get_defaults_file_path(self):
+        """Returns the path of the last-used DEFAULTS cache, next to the settings file."""
+        settings_path = self.get_settings_file_path()
+        if settings_path is None:
+            return None
+        return settings_path.replace("_settings.json", "_defaults.json")
+
+    def load_defaults(self, defaults):
+        """
+        Updates the GUI's DEFAULTS dict in place with the values saved by the last successful run.
+        Only keys the dict already has are taken, so renamed or removed inputs in the file are ignored.
+        """
+        filepath = self.get_defaults_file_path()
+        if not filepath or not os.path.exists(filepath):
+            return
+        try:
+            import json
+            with open(filepath, 'r') as f:
+                saved = json.load(f)
+            defaults.update({key: value for key, value in saved.items() if key in defaults})
+        except Exception as e:
+            print(f"WARNING: Failed to load last-used defaults: {e}")
+
+    def save_defaults(self, defaults):
+        """Writes DEFAULTS to disk so the values of the last successful run survive a restart."""
+        filepath = self.get_defaults_file_path()
+        if not filepath:
+            return
+        try:
+            import json
+            with open(filepath, 'w') as f:
+                json.dump(defaults, f, indent=4)
+        except Exception as e:
+            print(f"WARNING: Failed to save defaults: {e}")
+
     def save_settings(self):
         """Saves current widget values to a JSON file."""
         import json
@@ -373,7 +719,7 @@ class MeasurementApp:
         def extract_frame_settings(frame):
             frame_data = {}
             # Iterate through children
-            children = frame.winfo_children()
+            children = self.visible_children(frame)
             
             # We assume a pattern of Label -> Widget for most inputs
             # Or Checkbutton with text
@@ -480,7 +826,7 @@ class MeasurementApp:
         # Helper to apply settings
         def apply_settings(frame, data):
             if not data: return
-            children = frame.winfo_children()
+            children = self.visible_children(frame)
             
             for i, widget in enumerate(children):
                 if isinstance(widget, ttk.Label):
@@ -526,11 +872,85 @@ class MeasurementApp:
             entry_widget.delete(0, tk.END)
             entry_widget.insert(0, directory)
             
-    def get_visa_resources(self):
+    def get_visa_resources(self, force=False):
+        """
+        Lists VISA resources through the process wide ResourceManager the drivers also open instruments with.
+        A listing younger than VISA_CACHE_TTL is reused unless force is set (Refresh button)
+        """
+        if not force and _visa_cache["resources"] is not None and time.monotonic() - _visa_cache["ts"] < VISA_CACHE_TTL:
+            return list(_visa_cache["resources"])
         try:
-            from pyvisa import ResourceManager
-            rm = ResourceManager()
-            return list(rm.list_resources())
+            from piec.drivers.utilities import PiecManager
+            resources = tuple(PiecManager().rm.list_resources())
+            _visa_cache.update(ts=time.monotonic(), resources=resources)
+            return list(resources)
         except Exception as e:
             print(f"WARNING: pyvisa setup failed or no resources found: {e}")
             return []
+
+#Helper Functions
+_ARITHMETIC_OPS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+                   ast.Pow: operator.pow, ast.USub: operator.neg, ast.UAdd: operator.pos}
+
+@functools.lru_cache(maxsize=32)
+def evaluate_number(expr):
+    """
+    Evaluates a plain arithmetic expression typed into an entry, e.g. '1.0e-5**2' or '(50e-6)*(50e-6)'.
+    Only numbers, + - * / ** and parentheses are accepted, so unlike eval() no names or calls can run.
+    Results are cached per string, re-running with the same text skips parsing.
+    args:
+        expr (str): the expression text
+    returns:
+        float value of the expression
+    raises:
+        ValueError if the text is not a valid arithmetic expression
+    """
+    def walk(node):
+        if isinstance(node, ast.Expression):
+            return walk(node.body)
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return node.value
+        if sys.version_info < (3, 8) and isinstance(node, ast.Num): # python 3.6/3.7 parse numbers as Num
+            return node.n
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC_OPS:
+            return _ARITHMETIC_OPS[type(node.op)](walk(node.left), walk(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _ARITHMETIC_OPS:
+            return _ARITHMETIC_OPS[type(node.op)](walk(node.operand))
+        raise ValueError(f"Unsupported element in numeric expression: {expr!r}")
+    try:
+        return float(walk(ast.parse(expr.strip(), mode='eval')))
+    except SyntaxError:
+        raise ValueError(f"Invalid numeric expression: {expr!r}")
+
+def converts(text, convert):
+    """True if convert (float, int or evaluate_number) accepts text"""
+    try:
+        convert(text)
+    except (ValueError, ArithmeticError):
+        return False
+    return True
+
+def minmax_decimate(x, y, n_buckets):
+    """
+    Reduces a trace to at most 2*n_buckets + 1 points by keeping the min and max sample of y
+    in each of n_buckets equal index buckets (in sample order), so peaks survive the decimation.
+    args:
+        x (np.ndarray): x values of the trace
+        y (np.ndarray): y values of the trace, same length as x
+        n_buckets (int): number of buckets, typically the plot width in pixels
+    returns:
+        (x, y) decimated arrays
+    """
+    n = len(y)
+    per_bucket = n // n_buckets
+    if per_bucket < 2:
+        return x, y
+    buckets = y[:n_buckets * per_bucket].reshape(n_buckets, per_bucket)
+    offsets = np.arange(n_buckets) * per_bucket
+    lo = offsets + buckets.argmin(axis=1)
+    hi = offsets + buckets.argmax(axis=1)
+    idx = np.empty(2 * n_buckets + 1, dtype=np.intp)
+    idx[0:-1:2] = np.minimum(lo, hi) # keep sample order so lines are not drawn backwards
+    idx[1:-1:2] = np.maximum(lo, hi)
+    idx[-1] = n - 1
+    return x[idx], y[idx]
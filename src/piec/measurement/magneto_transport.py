@@ -1,5 +1,6 @@
 import numpy as np
 import time
+import threading
 import pandas as pd
 import matplotlib.pyplot as plt
 from piec.analysis.utilities import *
@@ -51,15 +52,43 @@ class MagnetoTransport:
         self.filename = None
         self.voltage_callibration = voltage_callibration #1V == 10000 Oe, but depends on hardware settings
         self.data = None
-        self.abort_requested = False
-        self.pause_requested = False
+        self._pause = threading.Event() # set while running, cleared while paused
+        self._pause.set()
+        self._stop = threading.Event()
+        self.sample_queue = None # optional queue.Queue, every captured point is also put on it (see AMR.capture_data_point)
         self.live_plot = live_plot
         self.plot_config = plot_config or {'x': 'angle', 'y': 'X'}
         self._fig = None
         self._ax = None
+        self._line = None
         self._in_jupyter = self._is_jupyter()
         #self._initialize() #checks communication
 
+    @property
+    def pause_requested(self):
+        """True while the capture loop is held before its next point, set from any thread"""
+        return not self._pause.is_set()
+
+    @pause_requested.setter
+    def pause_requested(self, value):
+        if value:
+            self._pause.clear()
+        else:
+            self._pause.set()
+
+    @property
+    def abort_requested(self):
+        """True once the capture loop should stop before its next point, set from any thread"""
+        return self._stop.is_set()
+
+    @abort_requested.setter
+    def abort_requested(self, value):
+        if value:
+            self._stop.set()
+            self._pause.set() # wake a paused loop so it can see the abort
+        else:
+            self._stop.clear()
+
     def initialize(self):
         """
         Ensure proper connection along all base instruments
@@ -158,6 +187,7 @@ class MagnetoTransport:
         self._ax.set_xlabel(x_col)
         self._ax.set_ylabel(y_col)
         self._ax.set_title(f'{y_col} vs {x_col} (live)')
+        self._line, = self._ax.plot([], [], 'o-', color='blue') # updated in place by _update_live_plot
 
     def _update_live_plot(self):
         """Update the live plot with the latest data."""
@@ -168,11 +198,9 @@ class MagnetoTransport:
         if x_col not in self.data.columns or y_col not in self.data.columns:
             return
 
-        self._ax.clear()
-        self._ax.plot(self.data[x_col], self.data[y_col], 'o-', color='blue')
-        self._ax.set_xlabel(x_col)
-        self._ax.set_ylabel(y_col)
-        self._ax.set_title(f'{y_col} vs {x_col} (live)')
+        self._line.set_data(self.data[x_col].to_numpy(), self.data[y_col].to_numpy())
+        self._ax.relim()
+        self._ax.autoscale_view()
 
         if self._in_jupyter:
             from IPython.display import display, clear_output
@@ -191,6 +219,7 @@ class MagnetoTransport:
         plt.close(self._fig)
         self._fig = None
         self._ax = None
+        self._line = None
 
     def plot_results(self):
         """Show a final static plot of the captured data."""
@@ -335,12 +364,9 @@ class AMR(MagnetoTransport):
             direction = 0 # counter-clockwise
         steps = convert_angle_to_steps(self.angle_step) 
         for angle in np.arange(0, self.total_angle, self.angle_step):
-            while self.pause_requested:
-                if self.abort_requested:
-                    break
-                time.sleep(0.5)
+            self._pause.wait() # blocks while paused, an abort sets it again
 
-            if self.abort_requested:
+            if self._stop.is_set():
                 print("Measurement aborted by user.")
                 break
 
@@ -354,7 +380,7 @@ class AMR(MagnetoTransport):
             time.sleep(1) # allow time for lockin to stablize
 
         #get final data point at the end of the loop
-        if self.angle != self.total_angle and not self.abort_requested:
+        if self.angle != self.total_angle and not self._stop.is_set():
             self.angle = self.total_angle
             self.arduino.step(abs(steps), direction)  # Move the stepper motor to the desired angle
             time.sleep(1) # allow time for lockin to stablize
@@ -384,6 +410,8 @@ class AMR(MagnetoTransport):
             self.data = pd.DataFrame({"angle": [self.angle], "field": [self.field], "X": [x_avg], "Y": [y_avg]})
         else:
             self.data.loc[len(self.data)] = {"angle": self.angle, "field": self.field, "X": x_avg, "Y": y_avg} #dynamically add new row
+        if self.sample_queue is not None:
+            self.sample_queue.put((self.angle, self.field, x_avg, y_avg)) # same order as the data columns
         # For now, just print the data point
         print(f"Data point at angle {self.angle} degrees and field {self.field} Oe: X={x_avg}, Y={y_avg}")
 
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# run the tests against this checkout's src/ without requiring an install
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
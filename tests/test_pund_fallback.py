@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pandas as pd
+
+from piec.analysis.utilities import metadata_and_data_to_csv, standard_csv_to_metadata_and_data
+
+
+def write_raw_pund(path):
+    """Writes a small synthetic raw PUND capture: a reset pulse followed by two identical measurement pulses"""
+    width = delay = 1e-3
+    t = np.linspace(0, 6e-3, 3000)
+    edges = [(0, width), (2*width, 3*width), (4*width, 5*width)]
+    v = np.zeros_like(t)
+    for sign, (start, stop) in zip((-1, 1, 1), edges):
+        v[(t >= start) & (t < stop)] = sign*0.05*np.exp(-(t[(t >= start) & (t < stop)] - start)/2e-4)
+    metadata = pd.DataFrame({'reset_amp': [1], 'reset_width': [width], 'reset_delay': [delay], 'p_u_amp': [1],
+                             'p_u_width': [width], 'p_u_delay': [delay], 'area': [1e-5], 'length': [6e-3],
+                             'time_offset': [0.0], 'processed': [False]})
+    metadata_and_data_to_csv(metadata, pd.DataFrame({'time (s)': t, 'voltage (V)': v}), str(path))
+
+
+def test_process_raw_3pp_without_numba(tmp_path):
+    """The numpy fallback must work on installs without numba and agree with the default path"""
+    fallback_path = tmp_path / "fallback.csv"
+    default_path = tmp_path / "default.csv"
+    write_raw_pund(fallback_path)
+    write_raw_pund(default_path)
+
+    script = textwrap.dedent(f"""
+        import sys
+        sys.modules['numba'] = None # behave as if numba were not installed
+        from piec.analysis import pund
+        assert pund._pund_core is pund._pund_core_numpy
+        pund.process_raw_3pp({str(fallback_path)!r}, auto_timeshift=False)
+    """)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.join(os.path.dirname(__file__), '..', 'src'), os.environ.get('PYTHONPATH')])))
+    subprocess.run([sys.executable, "-c", script], check=True, env=env)
+
+    from piec.analysis.pund import process_raw_3pp
+    process_raw_3pp(str(default_path), auto_timeshift=False)
+
+    _, fallback = standard_csv_to_metadata_and_data(str(fallback_path))
+    _, default = standard_csv_to_metadata_and_data(str(default_path))
+    for column in ('current (A)', 'polarization (uC/cm^2)', 'dP (uC/cm^2)'):
+        np.testing.assert_allclose(fallback[column], default[column], rtol=1e-9, atol=1e-12)